@@ -0,0 +1,210 @@
+# adaptive_runner.py
+
+import asyncio
+import math
+import time
+from statistics import NormalDist, mean, stdev
+
+TARGET_METRICS = ('throughput', 'mean_latency', 'p99')
+
+def mser_truncation(series, batch_size=5):
+    """MSER-m warmup truncation point for a series of observations.
+
+    The series is averaged in batches of `batch_size` (MSER-5 by default), and
+    the cut d minimising SSE(batches[d:]) / (n - d)^2 is chosen. Returns the
+    number of leading observations to discard, or None when the minimum falls
+    in the second half of the series, i.e. the run has not settled yet.
+    """
+    batches = [sum(series[i:i + batch_size]) / batch_size
+               for i in range(0, len(series) - batch_size + 1, batch_size)]
+    n = len(batches)
+    if n < 4:
+        return None
+
+    # Suffix sums make every candidate cut O(1)
+    suffix_sum = [0.0] * (n + 1)
+    suffix_squares = [0.0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_sum[i] = suffix_sum[i + 1] + batches[i]
+        suffix_squares[i] = suffix_squares[i + 1] + batches[i] * batches[i]
+
+    # The last quarter is not a candidate: a few trailing batches can show a
+    # spuriously small SSE and would make a settled run look unsettled
+    best_cut, best_statistic = None, math.inf
+    for d in range(n - max(2, n // 4)):
+        m = n - d
+        sse = suffix_squares[d] - suffix_sum[d] * suffix_sum[d] / m
+        statistic = sse / (m * m)
+        if statistic < best_statistic:
+            best_cut, best_statistic = d, statistic
+    if best_cut > n // 2:
+        return None
+    return best_cut * batch_size
+
+def t_quantile(confidence, degrees_of_freedom):
+    """Two-sided Student-t critical value (Cornish-Fisher expansion of the normal quantile)"""
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    df = degrees_of_freedom
+    return z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+
+class AdaptiveController:
+    """Watches one live level: ends the warmup phase, then stops the level once it converges.
+
+    The engines call attach() when the level starts and poll `stopped` in
+    their send loops; finish() turns the engine's result into the
+    post-warmup one.
+    """
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.stopped = False
+        self.phase = 'warmup'
+        self.warmup_detected = False
+        self.warmup_seconds = 0.0
+        self.mser_truncation_seconds = None
+        self.converged = False
+        self.estimate = None
+        self.relative_half_width = None
+        self.batches = 0
+
+    def attach(self, histogram, timeline):
+        self.histogram = histogram
+        self.timeline = timeline
+        self._attached_at = time.perf_counter()
+        self._measure_start = self._attached_at
+        self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def _watch(self):
+        while not self.stopped:
+            await asyncio.sleep(self.runner.check_interval_seconds)
+            if self.phase == 'warmup':
+                self._check_warmup()
+            else:
+                self._check_convergence()
+
+    def _check_warmup(self):
+        timeline = self.timeline
+        intervals = timeline.completed_intervals()
+        elapsed = time.perf_counter() - self._attached_at
+        truncation = None
+        if intervals * timeline.interval_seconds >= self.runner.min_warmup_seconds:
+            rates = [c / timeline.interval_seconds for c in timeline.counts[:intervals]]
+            truncation = mser_truncation(rates)
+        if truncation is None and elapsed < self.runner.max_warmup_seconds:
+            return
+
+        # Everything seen so far is discarded, including the settled tail after the
+        # MSER cut, because the histogram cannot be split retroactively
+        self.warmup_detected = truncation is not None
+        if truncation is not None:
+            self.mser_truncation_seconds = truncation * timeline.interval_seconds
+        self.warmup_seconds = elapsed
+        self.histogram.reset()
+        timeline.start()
+        self._measure_start = time.perf_counter()
+        self.phase = 'measure'
+
+    def _batches(self):
+        """(rate, mean latency µs) per completed batch of the measured phase"""
+        timeline = self.timeline
+        per_batch = max(1, round(self.runner.batch_seconds / timeline.interval_seconds))
+        intervals = timeline.completed_intervals()
+        batches = []
+        for start in range(0, intervals - per_batch + 1, per_batch):
+            count = sum(timeline.counts[start:start + per_batch])
+            latency = sum(timeline.latency_totals[start:start + per_batch])
+            batches.append((count / (per_batch * timeline.interval_seconds), latency / count if count else 0))
+        return batches
+
+    def _check_convergence(self):
+        runner = self.runner
+        batches = self._batches()
+        self.batches = len(batches)
+        if len(batches) < runner.min_batches:
+            return
+
+        if runner.target == 'p99':
+            histogram = self.histogram
+            if histogram.total_count * 0.01 < 10:
+                return
+            self.estimate = histogram.percentile(99)
+            z = NormalDist().inv_cdf(1 - (1 - runner.confidence) / 2)
+            low, high = histogram.percentile_interval(99, z)
+            half_width = (high - low) / 2
+        else:
+            values = [b[0] if runner.target == 'throughput' else b[1] for b in batches]
+            self.estimate = mean(values)
+            half_width = t_quantile(runner.confidence, len(values) - 1) * stdev(values) / math.sqrt(len(values))
+
+        self.relative_half_width = half_width / self.estimate if self.estimate else math.inf
+        if self.relative_half_width <= runner.precision:
+            self.converged = True
+            self.stopped = True
+
+    def finish(self, result):
+        """Replace the engine's whole-run figures with the measured phase and add the adaptive fields"""
+        self.stopped = True
+        self._task.cancel()
+        if self.phase == 'measure' and not self.converged:
+            self._check_convergence()
+
+        measured_seconds = time.perf_counter() - self._measure_start
+        messages = self.histogram.total_count
+        request_bytes = result['total_bytes'] / result['total_messages'] if result['total_messages'] else 0
+        for key in [k for k in result if k.endswith('_latency')]:
+            del result[key]
+        result.update({
+            'messages_per_second': messages / measured_seconds,
+            'bytes_per_second': messages * request_bytes / measured_seconds,
+            'total_messages': messages,
+            'total_bytes': int(messages * request_bytes),
+            'adaptive_target': self.runner.target,
+            'warmup_discarded_seconds': self.warmup_seconds,
+            'warmup_detected': self.warmup_detected,
+            'mser_truncation_seconds': self.mser_truncation_seconds,
+            'measured_seconds': measured_seconds,
+            'samples_needed': messages,
+            'batches': self.batches,
+            'ci_relative_half_width': self.relative_half_width,
+            'converged': self.converged
+        })
+        result.update(self.histogram.to_latency_dict(percentiles=(50, 95, 99)))
+        return result
+
+class AdaptiveRunner:
+    """Settings for adaptive levels; pass one as `adaptive=` to either engine's measure_concurrency_sweep.
+
+    Each level runs until the `confidence` interval of the target metric is
+    within `precision` (relative half-width) of its estimate, or until
+    time_cap_seconds in total. throughput and mean_latency use batch means of
+    batch_seconds; p99 uses the order-statistic interval from the histogram.
+    """
+
+    def __init__(self, target='throughput', precision=0.02, confidence=0.95, time_cap_seconds=60,
+                 min_warmup_seconds=2, max_warmup_seconds=None, batch_seconds=0.5, min_batches=5,
+                 check_interval_seconds=0.5):
+        if target not in TARGET_METRICS:
+            raise ValueError(f"Unknown adaptive target: {target}")
+        self.target = target
+        self.precision = precision
+        self.confidence = confidence
+        self.time_cap_seconds = time_cap_seconds
+        self.min_warmup_seconds = min_warmup_seconds
+        self.max_warmup_seconds = time_cap_seconds / 3 if max_warmup_seconds is None else max_warmup_seconds
+        self.batch_seconds = batch_seconds
+        self.min_batches = min_batches
+        self.check_interval_seconds = check_interval_seconds
+
+    def controller(self):
+        return AdaptiveController(self)
+
+def print_adaptive_results(results):
+    print(f"{'in-flight':>9} {'warmup s':>9} {'mser':>5} {'measured s':>10} {'samples':>9} "
+          f"{'batches':>7} {'ci ±%':>7} {'converged':>9}")
+    for r in results:
+        half_width = r['ci_relative_half_width']
+        print(f"{r['concurrency']:>9} {r['warmup_discarded_seconds']:>9.2f} "
+              f"{'yes' if r['warmup_detected'] else 'no':>5} {r['measured_seconds']:>10.2f} "
+              f"{r['samples_needed']:>9} {r['batches']:>7} "
+              f"{half_width * 100 if half_width is not None else float('nan'):>7.2f} "
+              f"{'yes' if r['converged'] else 'no':>9}")
@@ -0,0 +1,192 @@
+# async_performance_client.py
+
+import asyncio
+import functools
+import grpc
+import performance_test_pb2
+import performance_test_pb2_grpc
+from google.protobuf.timestamp_pb2 import Timestamp
+from performance_client import PAYLOAD_SIZES, build_request_ring, ingest_results
+from latency_histogram import LatencyHistogram
+from payload_pool import PayloadPool
+from load_report import print_sweep_results, ThroughputTimeline
+from grpc_fast_path import TestRequestTemplate, raw_unary_call
+from channel_pool import COMPRESSION_ALGORITHMS
+import time
+import uuid
+
+class AsyncPerformanceTestClient:
+    """grpc.aio load engine keeping a fixed number of RPCs in flight on one channel.
+
+    compression ('gzip' or 'deflate') is set on the channel, so it applies to
+    every request; call_compression is passed on each call instead. Response
+    compression is the server's choice.
+    """
+
+    def __init__(self, server_address='localhost:50051', payload_pool=None, compression=None,
+                 call_compression=None):
+        self.server_address = server_address
+        self.payload_pool = payload_pool or PayloadPool(PAYLOAD_SIZES.values())
+        self.compression = compression
+        self.call_compression = call_compression
+
+    def _channel(self):
+        compression = COMPRESSION_ALGORITHMS[self.compression] if self.compression else None
+        return grpc.aio.insecure_channel(self.server_address, compression=compression)
+
+    def _create_timestamp(self):
+        now = time.time()
+        timestamp = Timestamp()
+        timestamp.seconds = int(now)
+        timestamp.nanos = int((now - int(now)) * 1e9)
+        return timestamp
+
+    def _build_call(self, channel, stub, rpc, payload_size):
+        """Return (callable, request factory, payload bytes per request) for the given RPC"""
+        if rpc == 'ping':
+            def make_request():
+                return performance_test_pb2.PingRequest(
+                    client_id=str(uuid.uuid4()),
+                    send_timestamp=self._create_timestamp()
+                )
+            return stub.PingPong, make_request, 0
+
+        if rpc == 'unary':
+            payload = self.payload_pool.get_bytes(PAYLOAD_SIZES[payload_size])
+
+            def make_request():
+                return performance_test_pb2.TestRequest(
+                    request_id=str(uuid.uuid4()),
+                    timestamp=self._create_timestamp(),
+                    payload_size=payload_size,
+                    payload=payload
+                )
+            return stub.UnaryCall, make_request, len(payload)
+
+        if rpc == 'unary_fast':
+            # Pre-serialized template through an identity-serializer call; responses stay raw bytes
+            payload = self.payload_pool.get_bytes(PAYLOAD_SIZES[payload_size])
+            template = TestRequestTemplate(payload_size, payload)
+            return raw_unary_call(channel), template.render, len(payload)
+
+        raise ValueError(f"Unknown rpc: {rpc}")
+
+    async def _run_level(self, channel, stub, concurrency, rpc, payload_size, duration_seconds, monitor=None):
+        call, make_request, request_bytes = self._build_call(channel, stub, rpc, payload_size)
+        if self.call_compression:
+            call = functools.partial(call, compression=COMPRESSION_ALGORITHMS[self.call_compression])
+        histogram = LatencyHistogram()
+        timeline = ThroughputTimeline()
+        counters = {'messages': 0, 'errors': 0}
+        deadline = time.perf_counter() + duration_seconds
+        if monitor is not None:
+            monitor.attach(histogram, timeline)
+
+        async def worker():
+            while time.perf_counter() < deadline and not (monitor and monitor.stopped):
+                request = make_request()
+                start = time.perf_counter_ns()
+                try:
+                    await call(request)
+                except grpc.aio.AioRpcError:
+                    counters['errors'] += 1
+                    continue
+                latency_us = (time.perf_counter_ns() - start) // 1000
+                histogram.record(latency_us)
+                timeline.record(latency_us)
+                counters['messages'] += 1
+
+        cpu_start = time.process_time()
+        start_time = time.perf_counter()
+        timeline.start()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed_time = time.perf_counter() - start_time
+        cpu_time = time.process_time() - cpu_start
+
+        return self._build_result(concurrency, rpc, histogram, timeline, counters,
+                                  request_bytes, elapsed_time, cpu_time)
+
+    def _build_result(self, concurrency, rpc, histogram, timeline, counters, request_bytes,
+                      elapsed_time, cpu_time):
+        messages = counters['messages']
+        result = {
+            'rpc': rpc,
+            'concurrency': concurrency,
+            'connections': 1,
+            'messages_per_second': messages / elapsed_time,
+            'bytes_per_second': messages * request_bytes / elapsed_time,
+            'total_messages': messages,
+            'total_bytes': messages * request_bytes,
+            'errors': counters['errors'],
+            'client_cpu_percent': cpu_time / elapsed_time * 100,
+            'histogram': histogram,
+            'throughput_timeline': timeline
+        }
+        result.update(histogram.to_latency_dict(percentiles=(50, 95, 99)))
+        return result
+
+    async def measure_client_streaming_ingest(self, message_count=1_000_000,
+                                              payload_size=performance_test_pb2.SMALL):
+        """ClientStreaming ingest fed by an async generator of pre-built TestRequests"""
+        payload = self.payload_pool.get_bytes(PAYLOAD_SIZES[payload_size])
+        ring = build_request_ring(payload_size, payload)
+        ring_size = len(ring)
+
+        async def request_iterator():
+            for i in range(message_count):
+                yield ring[i % ring_size]
+
+        async with self._channel() as channel:
+            await channel.channel_ready()
+            stub = performance_test_pb2_grpc.PerformanceTestStub(channel)
+            cpu_start = time.process_time()
+            start_time = time.perf_counter()
+            response = await stub.ClientStreaming(request_iterator())
+            elapsed_time = time.perf_counter() - start_time
+            cpu_time = time.process_time() - cpu_start
+
+        return ingest_results(message_count, response.messages_processed, len(payload),
+                              elapsed_time, cpu_time, 'async')
+
+    async def measure_concurrency_sweep(self, concurrency_levels=(1, 8, 64, 512), rpc='unary',
+                                        payload_size=performance_test_pb2.SMALL, duration_seconds=10,
+                                        warmup_seconds=0, adaptive=None):
+        """Run the same RPC at each concurrency level over a single shared channel.
+
+        When warmup_seconds is set, each level first runs that long at the same
+        concurrency and its results are discarded. With an AdaptiveRunner,
+        duration_seconds and warmup_seconds are ignored: each level detects its
+        own warmup and runs until the target metric converges.
+        """
+        results = []
+        async with self._channel() as channel:
+            await channel.channel_ready()
+            stub = performance_test_pb2_grpc.PerformanceTestStub(channel)
+            for concurrency in concurrency_levels:
+                if adaptive is not None:
+                    controller = adaptive.controller()
+                    result = await self._run_level(channel, stub, concurrency, rpc, payload_size,
+                                                   adaptive.time_cap_seconds, controller)
+                    results.append(controller.finish(result))
+                    continue
+                if warmup_seconds > 0:
+                    await self._run_level(channel, stub, concurrency, rpc, payload_size, warmup_seconds)
+                results.append(await self._run_level(channel, stub, concurrency, rpc,
+                                                     payload_size, duration_seconds))
+        return results
+
+async def run():
+    client = AsyncPerformanceTestClient()
+
+    print("Testing PingPong at increasing concurrency...")
+    print_sweep_results(await client.measure_concurrency_sweep(rpc='ping'))
+
+    for size in [performance_test_pb2.SMALL, performance_test_pb2.MEDIUM, performance_test_pb2.LARGE]:
+        print(f"\nTesting UnaryCall, payload size: {performance_test_pb2.PayloadSize.Name(size)}")
+        print_sweep_results(await client.measure_concurrency_sweep(rpc='unary', payload_size=size))
+
+def main():
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
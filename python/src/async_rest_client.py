@@ -0,0 +1,262 @@
+# async_rest_client.py
+
+import asyncio
+import gzip
+import json
+import math
+import socket
+import time
+import uuid
+import zlib
+from urllib.parse import urlsplit
+from latency_histogram import LatencyHistogram
+from payload_pool import PayloadPool
+from load_report import print_sweep_results, ThroughputTimeline
+from rest_performance_client import PayloadSize
+
+ROUTES = {
+    'ping': '/ping',
+    'unary': '/unary',
+    'echo': '/bidirectional',
+    'batch': '/batch'
+}
+
+# Request-body encoders and response-body decoders by Content-Encoding
+BODY_ENCODERS = {'gzip': gzip.compress, 'deflate': zlib.compress}
+BODY_DECODERS = {'gzip': gzip.decompress, 'deflate': zlib.decompress}
+
+async def read_http_response(reader):
+    """Read one HTTP/1.1 response (Content-Length or chunked) from an asyncio StreamReader"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed before response")
+    status = int(status_line.split(b' ', 2)[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b';', 1)[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+        return status, headers, bytes(body)
+
+    return status, headers, await reader.readexactly(int(headers.get('content-length', 0)))
+
+class AsyncRestPerformanceClient:
+    """asyncio-streams HTTP/1.1 load engine: N keep-alive connections with M pipelined requests each.
+
+    Results use the same schema as AsyncPerformanceTestClient so both protocols
+    can be compared at equal concurrency.
+
+    compression ('gzip' or 'deflate') encodes request bodies with that
+    Content-Encoding; accept_encoding is sent as Accept-Encoding, and
+    compressed responses are decoded so their cost is part of the run.
+    """
+
+    def __init__(self, server_address='http://localhost:8080', payload_pool=None, compression=None,
+                 accept_encoding=None, compression_level=6):
+        parts = urlsplit(server_address)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.payload_pool = payload_pool or PayloadPool([size.value for size in PayloadSize])
+        self.compression = compression
+        self.accept_encoding = accept_encoding
+        self.compression_level = compression_level
+
+    def _build_request(self, route, payload_size, batch_size):
+        """Return (request bytes factory, payload bytes per request) for the given route"""
+        path = ROUTES[route]
+        head = (f"POST {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                + (f"Content-Encoding: {self.compression}\r\n" if self.compression else '')
+                + (f"Accept-Encoding: {self.accept_encoding}\r\n" if self.accept_encoding else '')
+                + "Content-Type: application/json\r\nContent-Length: ").encode('latin-1')
+
+        if route == 'ping':
+            def make_body():
+                return {
+                    'client_id': str(uuid.uuid4()),
+                    'send_timestamp': int(time.time() * 1_000_000)
+                }
+            request_bytes = 0
+        elif route in ('unary', 'echo'):
+            payload = self.payload_pool.get_text(payload_size.value)
+
+            def make_body():
+                return {'request_id': str(uuid.uuid4()), 'payload': payload}
+            request_bytes = len(payload)
+        else:
+            payload = self.payload_pool.get_text(payload_size.value)
+
+            def make_body():
+                return {
+                    'requests': [
+                        {'request_id': f"batch-{i}", 'payload': payload} for i in range(batch_size)
+                    ],
+                    'parallel_process': False
+                }
+            request_bytes = len(payload) * batch_size
+
+        encode = BODY_ENCODERS[self.compression] if self.compression else None
+        level = self.compression_level
+
+        def make_request():
+            body = json.dumps(make_body()).encode()
+            if encode is not None:
+                body = encode(body, level)
+            return head + str(len(body)).encode() + b'\r\n\r\n' + body
+
+        return make_request, request_bytes
+
+    async def _run_connection(self, make_request, in_flight, deadline, histogram, timeline, counters,
+                              monitor=None):
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        except OSError:
+            counters['errors'] += 1
+            return
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        slots = asyncio.Semaphore(in_flight)
+        sent = asyncio.Queue()
+
+        async def send_loop():
+            try:
+                while True:
+                    await slots.acquire()
+                    if time.perf_counter() >= deadline or (monitor and monitor.stopped):
+                        break
+                    request = make_request()
+                    sent.put_nowait(time.perf_counter_ns())
+                    writer.write(request)
+                    await writer.drain()
+            except ConnectionError:
+                counters['errors'] += 1
+            finally:
+                sent.put_nowait(None)
+
+        async def receive_loop():
+            while True:
+                start = await sent.get()
+                if start is None:
+                    break
+                status, headers, body = await read_http_response(reader)
+                coding = headers.get('content-encoding')
+                if coding in BODY_DECODERS:
+                    BODY_DECODERS[coding](body)
+                if 200 <= status < 300:
+                    latency_us = (time.perf_counter_ns() - start) // 1000
+                    histogram.record(latency_us)
+                    timeline.record(latency_us)
+                    counters['messages'] += 1
+                else:
+                    counters['errors'] += 1
+                slots.release()
+
+        sender = asyncio.ensure_future(send_loop())
+        try:
+            await receive_loop()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            counters['errors'] += 1
+        finally:
+            sender.cancel()
+            writer.close()
+
+    async def _run_level(self, concurrency, route, payload_size, duration_seconds,
+                         in_flight_per_connection, batch_size, monitor=None):
+        make_request, request_bytes = self._build_request(route, payload_size, batch_size)
+        in_flight = min(in_flight_per_connection, concurrency)
+        connections = math.ceil(concurrency / in_flight)
+        histogram = LatencyHistogram()
+        timeline = ThroughputTimeline()
+        counters = {'messages': 0, 'errors': 0}
+        deadline = time.perf_counter() + duration_seconds
+        if monitor is not None:
+            monitor.attach(histogram, timeline)
+
+        cpu_start = time.process_time()
+        start_time = time.perf_counter()
+        timeline.start()
+        await asyncio.gather(*(
+            self._run_connection(make_request, in_flight, deadline, histogram, timeline, counters, monitor)
+            for _ in range(connections)
+        ))
+        elapsed_time = time.perf_counter() - start_time
+        cpu_time = time.process_time() - cpu_start
+
+        messages = counters['messages']
+        result = {
+            'rpc': route,
+            'concurrency': connections * in_flight,
+            'connections': connections,
+            'messages_per_second': messages / elapsed_time,
+            'bytes_per_second': messages * request_bytes / elapsed_time,
+            'total_messages': messages,
+            'total_bytes': messages * request_bytes,
+            'errors': counters['errors'],
+            'client_cpu_percent': cpu_time / elapsed_time * 100,
+            'histogram': histogram,
+            'throughput_timeline': timeline
+        }
+        result.update(histogram.to_latency_dict(percentiles=(50, 95, 99)))
+        return result
+
+    async def measure_concurrency_sweep(self, concurrency_levels=(1, 8, 64, 512), route='unary',
+                                        payload_size=PayloadSize.SMALL, duration_seconds=10,
+                                        in_flight_per_connection=1, batch_size=10, warmup_seconds=0,
+                                        adaptive=None):
+        """Run the same route at each concurrency level.
+
+        Each level opens ceil(concurrency / in_flight_per_connection) keep-alive
+        connections; more than one in-flight request per connection is HTTP/1.1
+        pipelining. When warmup_seconds is set, each level first runs that long
+        and its results are discarded. With an AdaptiveRunner, duration_seconds
+        and warmup_seconds are ignored: each level detects its own warmup and
+        runs until the target metric converges.
+        """
+        results = []
+        for concurrency in concurrency_levels:
+            if adaptive is not None:
+                controller = adaptive.controller()
+                result = await self._run_level(concurrency, route, payload_size, adaptive.time_cap_seconds,
+                                               in_flight_per_connection, batch_size, controller)
+                results.append(controller.finish(result))
+                continue
+            if warmup_seconds > 0:
+                await self._run_level(concurrency, route, payload_size, warmup_seconds,
+                                      in_flight_per_connection, batch_size)
+            results.append(await self._run_level(concurrency, route, payload_size, duration_seconds,
+                                                 in_flight_per_connection, batch_size))
+        return results
+
+async def run():
+    client = AsyncRestPerformanceClient()
+
+    print("Testing /ping at increasing concurrency...")
+    print_sweep_results(await client.measure_concurrency_sweep(route='ping'))
+
+    for size in [PayloadSize.SMALL, PayloadSize.MEDIUM, PayloadSize.LARGE]:
+        print(f"\nTesting /unary, payload size: {size.name}")
+        print_sweep_results(await client.measure_concurrency_sweep(route='unary', payload_size=size))
+
+    print("\nTesting /unary, payload size: SMALL, 8 pipelined requests per connection")
+    print_sweep_results(await client.measure_concurrency_sweep(route='unary', in_flight_per_connection=8))
+
+    print("\nTesting /batch (10 x SMALL) at increasing concurrency...")
+    print_sweep_results(await client.measure_concurrency_sweep(route='batch'))
+
+def main():
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
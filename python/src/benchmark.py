@@ -0,0 +1,284 @@
+# benchmark.py
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+import grpc
+import performance_test_pb2
+from async_performance_client import AsyncPerformanceTestClient
+from async_rest_client import AsyncRestPerformanceClient, BODY_ENCODERS
+from rest_performance_client import PayloadSize
+from payload_pool import PayloadPool
+from load_report import print_sweep_results
+from results_store import ResultsStore
+from adaptive_runner import AdaptiveRunner, TARGET_METRICS, print_adaptive_results
+from netem_proxy import NetemRelay, NetworkConditions
+from channel_pool import COMPRESSION_ALGORITHMS
+
+# RPCs (gRPC) and routes (REST) each async engine can drive
+PROTOCOL_RPCS = {
+    'grpc': ('ping', 'unary', 'unary_fast'),
+    'rest': ('ping', 'unary', 'echo', 'batch')
+}
+
+PAYLOAD_NAMES = ('SMALL', 'MEDIUM', 'LARGE', 'XLARGE')
+
+def build_matrix(protocols, rpcs, payload_sizes, concurrency_levels, durations):
+    """Expand the option lists into scenarios; each scenario is one concurrency sweep.
+
+    Combinations an engine cannot run (e.g. batch over gRPC) are left out, and
+    ping, which carries no payload, runs once instead of once per payload size.
+    """
+    scenarios = []
+    for protocol in protocols:
+        for rpc in rpcs:
+            if rpc not in PROTOCOL_RPCS[protocol]:
+                continue
+            for payload_size in (['NONE'] if rpc == 'ping' else payload_sizes):
+                for duration in durations:
+                    scenarios.append({
+                        'protocol': protocol,
+                        'rpc': rpc,
+                        'payload_size': payload_size,
+                        'concurrency_levels': list(concurrency_levels),
+                        'duration_seconds': duration
+                    })
+    return scenarios
+
+def collect_environment(args):
+    """Describe the machine and software a run was made on"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    try:
+        import google.protobuf
+        protobuf_version = google.protobuf.__version__
+    except ImportError:
+        protobuf_version = None
+
+    return {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'hostname': socket.gethostname(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python_version': platform.python_version(),
+        'python_implementation': platform.python_implementation(),
+        'grpcio_version': grpc.__version__,
+        'protobuf_version': protobuf_version,
+        'git_commit': commit,
+        'grpc_target': args.grpc_target,
+        'rest_target': args.rest_target,
+        'command_line': sys.argv
+    }
+
+class BenchmarkRunner:
+    """Runs a scenario matrix on the async gRPC and REST engines and collects one row per level.
+
+    Rows hold only plain values; each level's latency histogram and throughput
+    timeline are kept alongside in `samples` for the results store.
+    """
+
+    def __init__(self, grpc_target='localhost:50051', rest_target='http://localhost:8080',
+                 payload_content='random', warmup_seconds=2, in_flight_per_connection=1, batch_size=10,
+                 adaptive=None, network=None, compression=None, compression_ratio=4.0, rest_request_encoding=None):
+        self.warmup_seconds = warmup_seconds
+        self.adaptive = adaptive
+        self.in_flight_per_connection = in_flight_per_connection
+        self.batch_size = batch_size
+        self.network = network
+        self.compression = compression
+        self.rest_request_encoding = rest_request_encoding
+        payload_pool = PayloadPool([s.value for s in PayloadSize], payload_content, target_ratio=compression_ratio)
+        self.payload_content = payload_pool.label
+        # gRPC compresses requests on the channel; REST only asks for encoded responses, since an
+        # encoded request body is rejected by servers without decoding support (the C++ one)
+        self.grpc_client = AsyncPerformanceTestClient(grpc_target, payload_pool, compression)
+        self.rest_client = AsyncRestPerformanceClient(rest_target, payload_pool, rest_request_encoding, compression)
+
+    async def run_scenario(self, scenario):
+        payload_name = scenario['payload_size']
+        if scenario['protocol'] == 'grpc':
+            payload_size = performance_test_pb2.SMALL if payload_name == 'NONE' else \
+                performance_test_pb2.PayloadSize.Value(payload_name)
+            levels = await self.grpc_client.measure_concurrency_sweep(
+                scenario['concurrency_levels'], scenario['rpc'], payload_size,
+                scenario['duration_seconds'], self.warmup_seconds, self.adaptive)
+        else:
+            payload_size = PayloadSize.SMALL if payload_name == 'NONE' else PayloadSize[payload_name]
+            levels = await self.rest_client.measure_concurrency_sweep(
+                scenario['concurrency_levels'], scenario['rpc'], payload_size,
+                scenario['duration_seconds'], self.in_flight_per_connection,
+                self.batch_size, self.warmup_seconds, self.adaptive)
+
+        rows = []
+        samples = []
+        for level in levels:
+            samples.append((level.pop('histogram'), level.pop('throughput_timeline')))
+            row = {
+                'protocol': scenario['protocol'],
+                'rpc': scenario['rpc'],
+                'payload_size': payload_name,
+                'payload_content': self.payload_content,
+                'compression': self.compression,
+                'request_encoding': self.rest_request_encoding if scenario['protocol'] == 'rest' else None,
+                'duration_seconds': scenario['duration_seconds'],
+                'warmup_seconds': self.warmup_seconds if self.adaptive is None else None
+            }
+            if self.network is not None:
+                row.update(self.network.to_dict())
+            row.update(level)
+            rows.append(row)
+        return rows, samples
+
+    async def run(self, scenarios):
+        rows = []
+        samples = []
+        for index, scenario in enumerate(scenarios, 1):
+            if self.adaptive is None:
+                phases = f"duration={scenario['duration_seconds']}s warmup={self.warmup_seconds}s"
+            else:
+                phases = (f"adaptive {self.adaptive.target} to ±{self.adaptive.precision * 100:g}% "
+                          f"(cap {self.adaptive.time_cap_seconds:g}s)")
+            network = f" network={self.network}" if self.network is not None else ''
+            print(f"\n[{index}/{len(scenarios)}] {scenario['protocol']} {scenario['rpc']} "
+                  f"payload={scenario['payload_size']}{network} {phases}")
+            scenario_rows, scenario_samples = await self.run_scenario(scenario)
+            print_sweep_results(scenario_rows)
+            if self.adaptive is not None:
+                print_adaptive_results(scenario_rows)
+            rows.extend(scenario_rows)
+            samples.extend(scenario_samples)
+        return rows, samples
+
+def write_json(path, environment, scenarios, rows):
+    with open(path, 'w') as f:
+        json.dump({'environment': environment, 'scenarios': scenarios, 'results': rows}, f, indent=2)
+
+def write_csv(path, environment, rows):
+    """One row per measured level; the run is identified by host, commit and start time on every row"""
+    run_columns = {name: environment[name] for name in ('started_at', 'hostname', 'git_commit')}
+    columns = list(run_columns)
+    for row in rows:
+        columns.extend(name for name in row if name not in columns)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**run_columns, **row})
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run a protocol x rpc x payload x concurrency x duration benchmark matrix")
+    parser.add_argument('--config', help="JSON file whose keys set defaults for any option below")
+    parser.add_argument('--protocol', nargs='+', choices=sorted(PROTOCOL_RPCS), default=['grpc', 'rest'])
+    parser.add_argument('--rpc', nargs='+', default=['ping', 'unary'],
+                        choices=sorted({rpc for rpcs in PROTOCOL_RPCS.values() for rpc in rpcs}))
+    parser.add_argument('--payload-size', nargs='+', choices=PAYLOAD_NAMES, default=list(PAYLOAD_NAMES[:3]))
+    parser.add_argument('--payload-content', choices=PayloadPool.CONTENT_MODES, default='random')
+    parser.add_argument('--compression-ratio', type=float, default=4.0,
+                        help="Target zlib ratio for --payload-content ratio")
+    parser.add_argument('--compression', choices=[name for name in COMPRESSION_ALGORITHMS if name != 'none'],
+                        help="gRPC channel compression; REST Accept-Encoding (responses)")
+    parser.add_argument('--rest-request-encoding', choices=sorted(BODY_ENCODERS),
+                        help="Content-Encoding for REST request bodies; only rest_server.py decodes them")
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 64])
+    parser.add_argument('--duration', nargs='+', type=float, default=[10])
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--pipeline', type=int, default=1, help="REST requests in flight per connection")
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--grpc-target', default='localhost:50051')
+    parser.add_argument('--rest-target', default='http://localhost:8080')
+    parser.add_argument('--json', help="Write results and environment metadata to this JSON file")
+    parser.add_argument('--csv', help="Write one row per measured level to this CSV file")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="Detect warmup and stop each level once the target metric converges")
+    parser.add_argument('--adaptive-target', choices=TARGET_METRICS, default='throughput')
+    parser.add_argument('--precision', type=float, default=2,
+                        help="Adaptive: stop at this confidence-interval half-width, percent of the estimate")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--time-cap', type=float, default=60, help="Adaptive: maximum seconds per level")
+    parser.add_argument('--network', nargs='+',
+                        help=f"Run the matrix once per emulated network, through a local proxy: a preset "
+                             f"({', '.join(NetworkConditions.PRESETS)}) or "
+                             f"'name:rtt=80,jitter=5,bandwidth=100,stall=0.001,stall_ms=200'")
+    parser.add_argument('--network-seed', type=int, help="Seed for jitter and stalls")
+    parser.add_argument('--store', help="Append every level, with its histogram, to this results store")
+    parser.add_argument('--label', help="Build label for the store (default: current git commit)")
+
+    args, _ = parser.parse_known_args(argv)
+    if args.config:
+        with open(args.config) as f:
+            parser.set_defaults(**{key.replace('-', '_'): value for key, value in json.load(f).items()})
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    scenarios = build_matrix(args.protocol, args.rpc, args.payload_size, args.concurrency, args.duration)
+    if not scenarios:
+        print("No runnable scenarios in the requested matrix")
+        return
+
+    environment = collect_environment(args)
+    adaptive = None
+    if args.adaptive:
+        # Duration is not part of an adaptive matrix: each level picks its own
+        scenarios = build_matrix(args.protocol, args.rpc, args.payload_size, args.concurrency, [None])
+        adaptive = AdaptiveRunner(args.adaptive_target, args.precision / 100, args.confidence, args.time_cap)
+    networks = [NetworkConditions.from_spec(spec) for spec in args.network] if args.network else [None]
+    if args.network:
+        environment['networks'] = [network.to_dict() for network in networks]
+    levels = sum(len(s['concurrency_levels']) for s in scenarios) * len(networks)
+    if adaptive is None:
+        estimate = sum((s['duration_seconds'] + args.warmup) * len(s['concurrency_levels'])
+                       for s in scenarios) * len(networks)
+        print(f"Running {len(scenarios) * len(networks)} scenarios ({levels} measured levels, "
+              f"~{estimate / 60:.1f} min)")
+    else:
+        print(f"Running {len(scenarios) * len(networks)} scenarios ({levels} adaptive levels, "
+              f"at most {levels * args.time_cap / 60:.1f} min)")
+
+    start_time = time.time()
+    rows = []
+    samples = []
+    for network in networks:
+        if network is None:
+            runner = BenchmarkRunner(args.grpc_target, args.rest_target, args.payload_content,
+                                     args.warmup, args.pipeline, args.batch_size, adaptive,
+                                     compression=args.compression, compression_ratio=args.compression_ratio,
+                                     rest_request_encoding=args.rest_request_encoding)
+            network_rows, network_samples = asyncio.run(runner.run(scenarios))
+        else:
+            with NetemRelay.for_target(args.grpc_target, conditions=network, seed=args.network_seed) as grpc_relay, \
+                    NetemRelay.for_target(args.rest_target, conditions=network, seed=args.network_seed) as rest_relay:
+                runner = BenchmarkRunner(grpc_relay.address, rest_relay.url, args.payload_content,
+                                         args.warmup, args.pipeline, args.batch_size, adaptive, network,
+                                         args.compression, args.compression_ratio, args.rest_request_encoding)
+                network_rows, network_samples = asyncio.run(runner.run(scenarios))
+        rows.extend(network_rows)
+        samples.extend(network_samples)
+    environment['elapsed_seconds'] = time.time() - start_time
+
+    if args.json:
+        write_json(args.json, environment, scenarios, rows)
+        print(f"\nWrote {len(rows)} results to {args.json}")
+    if args.csv:
+        write_csv(args.csv, environment, rows)
+        print(f"Wrote {len(rows)} results to {args.csv}")
+    if args.store:
+        run_id = ResultsStore(args.store).append_run(rows, samples, environment, args.label)
+        print(f"Stored run {run_id} in {args.store}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# channel_pool.py
+
+import itertools
+import threading
+import time
+import grpc
+import performance_test_pb2_grpc
+from latency_histogram import LatencyHistogram
+
+# Matches the 10MB send/receive limits set by the C++ server builder
+MAX_MESSAGE_LENGTH = 10 * 1024 * 1024
+
+DEFAULT_CHANNEL_OPTIONS = {
+    'grpc.max_send_message_length': MAX_MESSAGE_LENGTH,
+    'grpc.max_receive_message_length': MAX_MESSAGE_LENGTH,
+    'grpc.keepalive_time_ms': 30000,
+    'grpc.keepalive_timeout_ms': 10000,
+    'grpc.http2.bdp_probe': 1,
+    'grpc.http2.write_buffer_size': 1024 * 1024,
+    # Each channel gets its own subchannel (and so its own TCP connection)
+    'grpc.use_local_subchannel_pool': 1
+}
+
+# Message compression by name, for channels (all calls) or single calls
+COMPRESSION_ALGORITHMS = {
+    'none': grpc.Compression.NoCompression,
+    'gzip': grpc.Compression.Gzip,
+    'deflate': grpc.Compression.Deflate
+}
+
+class _RoundRobinStub:
+    """Looks like a PerformanceTestStub; every method lookup goes to the next channel"""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._pool.stubs[self._pool.next_index()], name)
+
+class ChannelPool:
+    """N independent gRPC channels to one server with round-robin dispatch and per-channel stats"""
+
+    def __init__(self, server_address='localhost:50051', size=1, options=None, interceptors=(), compression=None):
+        self.server_address = server_address
+        self.size = size
+        self.options = dict(DEFAULT_CHANNEL_OPTIONS)
+        self.options.update(options or {})
+        self.compression = compression
+
+        self.channels = [
+            grpc.insecure_channel(server_address, options=self._channel_options(i),
+                                  compression=COMPRESSION_ALGORITHMS[compression] if compression else None)
+            for i in range(size)
+        ]
+        if interceptors:
+            self.channels = [grpc.intercept_channel(c, *interceptors) for c in self.channels]
+        self.stubs = [performance_test_pb2_grpc.PerformanceTestStub(c) for c in self.channels]
+        self.stub = _RoundRobinStub(self)
+        self._counter = itertools.count()
+        self.reset_stats()
+
+    def _channel_options(self, index):
+        options = list(self.options.items())
+        # A distinct channel arg also keeps the channels from being merged by the core
+        options.append(('grpc.channel_pool_index', index))
+        return options
+
+    def next_index(self):
+        return next(self._counter) % self.size
+
+    def reset_stats(self):
+        self._locks = [threading.Lock() for _ in range(self.size)]
+        self._histograms = [LatencyHistogram() for _ in range(self.size)]
+        self._bytes = [0] * self.size
+        self._errors = [0] * self.size
+
+    def timed_call(self, method, request, request_bytes=0):
+        """Dispatch a unary call to the next channel and record its latency against that channel"""
+        index = self.next_index()
+        call = getattr(self.stubs[index], method)
+        start = time.perf_counter_ns()
+        try:
+            response = call(request)
+        except grpc.RpcError:
+            with self._locks[index]:
+                self._errors[index] += 1
+            raise
+        latency_us = (time.perf_counter_ns() - start) // 1000
+        with self._locks[index]:
+            self._histograms[index].record(latency_us)
+            self._bytes[index] += request_bytes
+        return response
+
+    def channel_stats(self, elapsed_time):
+        stats = []
+        for index in range(self.size):
+            histogram = self._histograms[index]
+            channel = {
+                'channel': index,
+                'messages_per_second': histogram.total_count / elapsed_time,
+                'bytes_per_second': self._bytes[index] / elapsed_time,
+                'total_messages': histogram.total_count,
+                'errors': self._errors[index]
+            }
+            channel.update(histogram.to_latency_dict())
+            stats.append(channel)
+        return stats
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
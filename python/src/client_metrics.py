@@ -0,0 +1,360 @@
+# client_metrics.py
+
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import grpc
+import performance_test_pb2
+from latency_histogram import LatencyHistogram
+
+# Prometheus histogram bucket bounds, in seconds
+DURATION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# 1% precision up to 60 s keeps each per-thread, per-method histogram around 20 KB
+_HISTOGRAM_RANGE_US = 60_000_000
+_HISTOGRAM_FIGURES = 2
+
+class MethodStats:
+    __slots__ = ('histogram', 'messages_sent', 'messages_received', 'bytes_sent', 'bytes_received', 'codes')
+
+    def __init__(self):
+        self.histogram = LatencyHistogram(_HISTOGRAM_RANGE_US, _HISTOGRAM_FIGURES)
+        self.messages_sent = 0
+        self.messages_received = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.codes = {}
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.messages_sent += other.messages_sent
+        self.messages_received += other.messages_received
+        self.bytes_sent += other.bytes_sent
+        self.bytes_received += other.bytes_received
+        for code, count in other.codes.items():
+            self.codes[code] = self.codes.get(code, 0) + count
+
+class MetricsRegistry:
+    """Per-method client metrics kept in per-thread accumulators.
+
+    Every thread records into its own dict of MethodStats, so the hot path
+    takes no lock; a lock is only taken the first time a thread records and
+    when a scrape merges all threads' accumulators into one snapshot.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._accumulators = []
+
+    def _accumulator(self):
+        accumulator = getattr(self._local, 'stats', None)
+        if accumulator is None:
+            accumulator = self._local.stats = {}
+            with self._lock:
+                self._accumulators.append(accumulator)
+        return accumulator
+
+    def record(self, protocol, method, code, latency_ns, messages_sent=1, messages_received=1,
+               bytes_sent=0, bytes_received=0):
+        accumulator = self._accumulator()
+        stats = accumulator.get((protocol, method))
+        if stats is None:
+            stats = accumulator[(protocol, method)] = MethodStats()
+        stats.histogram.record(latency_ns // 1000)
+        stats.messages_sent += messages_sent
+        stats.messages_received += messages_received
+        stats.bytes_sent += bytes_sent
+        stats.bytes_received += bytes_received
+        stats.codes[code] = stats.codes.get(code, 0) + 1
+
+    def snapshot(self):
+        """(protocol, method) -> MethodStats merged across every thread"""
+        with self._lock:
+            accumulators = list(self._accumulators)
+        merged = {}
+        for accumulator in accumulators:
+            for key, stats in list(accumulator.items()):
+                merged.setdefault(key, MethodStats()).merge(stats)
+        return merged
+
+    def render_prometheus(self):
+        """Current metrics in the Prometheus text exposition format"""
+        snapshot = sorted(self.snapshot().items())
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(protocol, method, **extra):
+            pairs = [('protocol', protocol), ('method', method)] + list(extra.items())
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+        family('client_requests_total', 'counter', "Completed client calls by status code.")
+        for (protocol, method), stats in snapshot:
+            for code, count in sorted(stats.codes.items(), key=lambda item: str(item[0])):
+                lines.append(f"client_requests_total{labels(protocol, method, code=code)} {count}")
+
+        counters = (
+            ('client_messages_sent_total', 'messages_sent', "Messages sent by the client."),
+            ('client_messages_received_total', 'messages_received', "Messages received by the client."),
+            ('client_bytes_sent_total', 'bytes_sent', "Request bytes sent by the client."),
+            ('client_bytes_received_total', 'bytes_received', "Response bytes received by the client.")
+        )
+        for name, attribute, help_text in counters:
+            family(name, 'counter', help_text)
+            for (protocol, method), stats in snapshot:
+                lines.append(f"{name}{labels(protocol, method)} {getattr(stats, attribute)}")
+
+        family('client_request_duration_seconds', 'histogram', "Client-observed call duration.")
+        for (protocol, method), stats in snapshot:
+            histogram = stats.histogram
+            cumulative = 0
+            bucket = 0
+            recorded = list(histogram.recorded_values())
+            for bound in DURATION_BUCKETS:
+                while bucket < len(recorded) and recorded[bucket][0] <= bound * 1_000_000:
+                    cumulative += recorded[bucket][1]
+                    bucket += 1
+                lines.append(f"client_request_duration_seconds_bucket"
+                             f"{labels(protocol, method, le=bound)} {cumulative}")
+            lines.append(f"client_request_duration_seconds_bucket"
+                         f"{labels(protocol, method, le='+Inf')} {histogram.total_count}")
+            lines.append(f"client_request_duration_seconds_sum{labels(protocol, method)} {histogram.total / 1e6}")
+            lines.append(f"client_request_duration_seconds_count{labels(protocol, method)} {histogram.total_count}")
+        return '\n'.join(lines) + '\n'
+
+def _message_size(message):
+    return len(message) if isinstance(message, (bytes, bytearray)) else message.ByteSize()
+
+def _method_name(client_call_details):
+    return client_call_details.method.rsplit('/', 1)[-1]
+
+class _StreamingCallProxy:
+    """Iterates a response-streaming call, counting messages and recording the call when it ends"""
+
+    def __init__(self, call, on_done):
+        self._call = call
+        self._on_done = on_done
+        self.messages = 0
+        self.bytes = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            response = next(self._call)
+        except StopIteration:
+            self._on_done(self, self._call.code())
+            raise
+        except grpc.RpcError as e:
+            self._on_done(self, e.code())
+            raise
+        self.messages += 1
+        self.bytes += _message_size(response)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._call, name)
+
+class MetricsClientInterceptor(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor,
+                               grpc.StreamUnaryClientInterceptor, grpc.StreamStreamClientInterceptor):
+    """Records every call on an intercepted channel into a MetricsRegistry.
+
+    Byte counts are serialized message sizes (ByteSize(), or len() for the
+    raw-bytes fast path), i.e. protobuf payload without HTTP/2 framing.
+    """
+
+    def __init__(self, registry, count_bytes=True):
+        self.registry = registry
+        self.count_bytes = count_bytes
+
+    def _size(self, message):
+        return _message_size(message) if self.count_bytes else 0
+
+    def _counted(self, request_iterator, counts):
+        for request in request_iterator:
+            counts[0] += 1
+            counts[1] += self._size(request)
+            yield request
+
+    def _record_when_done(self, future, method, start, messages_sent, bytes_sent):
+        def done(f):
+            code = f.code()
+            bytes_received = self._size(f.result()) if code == grpc.StatusCode.OK else 0
+            self.registry.record('grpc', method, code.name, time.perf_counter_ns() - start,
+                                 messages_sent(), 1 if code == grpc.StatusCode.OK else 0,
+                                 bytes_sent(), bytes_received)
+        future.add_done_callback(done)
+        return future
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        start = time.perf_counter_ns()
+        size = self._size(request)
+        return self._record_when_done(continuation(client_call_details, request),
+                                      _method_name(client_call_details), start, lambda: 1, lambda: size)
+
+    def intercept_stream_unary(self, continuation, client_call_details, request_iterator):
+        start = time.perf_counter_ns()
+        counts = [0, 0]
+        future = continuation(client_call_details, self._counted(request_iterator, counts))
+        return self._record_when_done(future, _method_name(client_call_details), start,
+                                      lambda: counts[0], lambda: counts[1])
+
+    def _streaming_response(self, call, method, start, counts):
+        def done(proxy, code):
+            self.registry.record('grpc', method, code.name, time.perf_counter_ns() - start,
+                                 counts[0], proxy.messages, counts[1], proxy.bytes)
+        return _StreamingCallProxy(call, done)
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        start = time.perf_counter_ns()
+        counts = [1, self._size(request)]
+        return self._streaming_response(continuation(client_call_details, request),
+                                        _method_name(client_call_details), start, counts)
+
+    def intercept_stream_stream(self, continuation, client_call_details, request_iterator):
+        start = time.perf_counter_ns()
+        counts = [0, 0]
+        call = continuation(client_call_details, self._counted(request_iterator, counts))
+        return self._streaming_response(call, _method_name(client_call_details), start, counts)
+
+def rest_metrics_hook(registry):
+    """A RestTransport hook that records each request as protocol 'rest', method 'POST /path'"""
+    def hook(method, path, status, latency_ns, bytes_out, bytes_in, messages_in):
+        ok = status != 'error' and status < 400
+        registry.record('rest', f"{method} {path}", status, latency_ns, 1, messages_in if ok else 0,
+                        bytes_out, bytes_in)
+    return hook
+
+def start_metrics_server(registry, port=9464, host='0.0.0.0'):
+    """Serve registry at http://host:port/metrics from a daemon thread; call .shutdown() to stop"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def measure_recording_cost(iterations=100000):
+    """Nanoseconds one registry.record() call costs, with no RPC around it"""
+    registry = MetricsRegistry()
+    start = time.perf_counter_ns()
+    for i in range(iterations):
+        registry.record('grpc', 'UnaryCall', 'OK', 250_000 + i % 1000, 1, 1, 1024, 1100)
+    return (time.perf_counter_ns() - start) / iterations
+
+def measure_overhead(grpc_target='localhost:50051', rest_target='http://localhost:8080',
+                     rounds=10, calls_per_round=500):
+    """Per-call cost of the instrumentation, plain vs instrumented clients in alternating rounds"""
+    from performance_client import PerformanceTestClient
+    from rest_performance_client import RestPerformanceClient
+
+    registry = MetricsRegistry()
+    grpc_plain = PerformanceTestClient(grpc_target)
+    grpc_instrumented = PerformanceTestClient(grpc_target, metrics=registry)
+    rest_plain = RestPerformanceClient(rest_target)
+    rest_instrumented = RestPerformanceClient(rest_target, metrics=registry)
+
+    def grpc_ping(client):
+        client.stub.PingPong(performance_test_pb2.PingRequest(
+            client_id=str(uuid.uuid4()), send_timestamp=client.create_timestamp()))
+
+    def rest_ping(client):
+        client.transport.post("/ping", json={'client_id': str(uuid.uuid4()),
+                                             'send_timestamp': time.time_ns() // 1000})
+
+    results = {'record_ns': measure_recording_cost()}
+    for protocol, ping, plain, instrumented in (('grpc', grpc_ping, grpc_plain, grpc_instrumented),
+                                                ('rest', rest_ping, rest_plain, rest_instrumented)):
+        timings = {'plain': [], 'instrumented': []}
+        for _ in range(rounds):
+            # Alternate so drift on the machine affects both sides alike
+            for name, client in (('plain', plain), ('instrumented', instrumented)):
+                start = time.perf_counter_ns()
+                for _ in range(calls_per_round):
+                    ping(client)
+                timings[name].append((time.perf_counter_ns() - start) / calls_per_round / 1000)
+        plain_us = statistics.median(timings['plain'])
+        instrumented_us = statistics.median(timings['instrumented'])
+        results[protocol] = {
+            'plain_us': plain_us,
+            'instrumented_us': instrumented_us,
+            'overhead_us': instrumented_us - plain_us,
+            'overhead_percent': (instrumented_us / plain_us - 1) * 100
+        }
+    return results
+
+def print_overhead(results):
+    print(f"registry.record(): {results['record_ns'] / 1000:.2f} µs per call")
+    for protocol in ('grpc', 'rest'):
+        r = results[protocol]
+        print(f"{protocol} ping: {r['plain_us']:.1f} µs plain, {r['instrumented_us']:.1f} µs instrumented, "
+              f"overhead {r['overhead_us']:+.1f} µs ({r['overhead_percent']:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Instrumented client load with a live Prometheus endpoint")
+    parser.add_argument('--port', type=int, default=9464)
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--grpc-target', default='localhost:50051')
+    parser.add_argument('--rest-target', default='http://localhost:8080')
+    args = parser.parse_args()
+
+    from performance_client import PerformanceTestClient
+    from rest_performance_client import RestPerformanceClient
+
+    registry = MetricsRegistry()
+    server = start_metrics_server(registry, args.port)
+    print(f"Serving metrics on http://localhost:{args.port}/metrics")
+
+    grpc_client = PerformanceTestClient(args.grpc_target, metrics=registry)
+    rest_client = RestPerformanceClient(args.rest_target, metrics=registry)
+    deadline = time.perf_counter() + args.duration
+
+    def grpc_worker():
+        while time.perf_counter() < deadline:
+            grpc_client.stub.UnaryCall(performance_test_pb2.TestRequest(
+                request_id=str(uuid.uuid4()),
+                timestamp=grpc_client.create_timestamp(),
+                payload_size=performance_test_pb2.SMALL,
+                payload=grpc_client.generate_payload(performance_test_pb2.SMALL)
+            ))
+
+    def rest_worker():
+        payload = rest_client.payload_pool.get_text(1024)
+        while time.perf_counter() < deadline:
+            rest_client.transport.post("/unary", json={'request_id': str(uuid.uuid4()), 'payload': payload})
+
+    print(f"Running gRPC and REST unary load for {args.duration:.0f} seconds "
+          f"({args.threads} threads each)...")
+    threads = [threading.Thread(target=worker) for worker in [grpc_worker, rest_worker] for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    print("\nMeasuring instrumentation overhead...")
+    print_overhead(measure_overhead(args.grpc_target, args.rest_target))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# clock_sync.py
+
+import time
+from latency_histogram import LatencyHistogram
+
+ONE_WAY_PERCENTILES = (50, 90, 99, 99.9)
+
+# Below this many windows or seconds, offset noise swamps the slope; the offset is taken as constant
+MIN_DRIFT_WINDOWS = 10
+MIN_DRIFT_SECONDS = 10
+
+# Default clock sync run: long enough that the min-RTT windows span MIN_DRIFT_SECONDS
+SYNC_SECONDS = 15
+SYNC_PINGS_PER_SECOND = 400
+
+def _linear_fit(xs, ys):
+    """Least-squares intercept and slope of ys against xs"""
+    n = len(xs)
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    if not sxx:
+        return mean_y, 0.0
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx
+    return mean_y - slope * mean_x, slope
+
+def paced_pings(duration_seconds=SYNC_SECONDS, rate=SYNC_PINGS_PER_SECOND):
+    """Yield once per ping slot, sleeping until each slot so the pings spread evenly over the run"""
+    interval = 1 / rate
+    start = time.perf_counter()
+    for i in range(int(duration_seconds * rate)):
+        delay = start + i * interval - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        yield
+
+class ClockSyncEstimator:
+    """NTP-style clock offset, drift and one-way latency from ping timestamps.
+
+    Each sample is (client send µs, server µs, client receive µs) with client
+    times from the client's wall clock and the server time from the response.
+    Per window of `window_size` pings only the minimum-RTT ping is trusted (it
+    saw the least queueing, so its RTT is most nearly split evenly), giving one
+    offset = server - (send + receive) / 2 per window. A line through those
+    offsets gives the offset at any instant plus the drift between the clocks,
+    and subtracting it turns every ping into a forward and a return latency.
+    Drift is only fitted from MIN_DRIFT_WINDOWS windows spanning
+    MIN_DRIFT_SECONDS; short runs report drift_ppm None and a constant offset.
+
+    Like NTP, this cannot see asymmetry that is present even in the fastest
+    pings; what it separates is how queueing and delay beyond that floor fall on
+    each direction.
+    """
+
+    def __init__(self, window_size=100):
+        self.window_size = window_size
+        self.samples = []
+
+    def add(self, client_send_us, server_us, client_receive_us):
+        self.samples.append((client_send_us, server_us, client_receive_us))
+
+    def _filtered_offsets(self):
+        """(midpoint µs, offset µs, rtt µs) of the minimum-RTT ping in each window"""
+        filtered = []
+        for start in range(0, len(self.samples), self.window_size):
+            window = self.samples[start:start + self.window_size]
+            send, server, receive = min(window, key=lambda s: s[2] - s[0])
+            midpoint = (send + receive) / 2
+            filtered.append((midpoint, server - midpoint, receive - send))
+        return filtered
+
+    def analyze(self):
+        if not self.samples:
+            return {'samples': 0}
+
+        filtered = self._filtered_offsets()
+        origin = self.samples[0][0]
+        elapsed_s = [(midpoint - origin) / 1e6 for midpoint, _, _ in filtered]
+        offsets = [offset for _, offset, _ in filtered]
+        drift_fitted = len(filtered) >= MIN_DRIFT_WINDOWS and elapsed_s[-1] - elapsed_s[0] >= MIN_DRIFT_SECONDS
+        if drift_fitted:
+            intercept, slope = _linear_fit(elapsed_s, offsets)
+        else:
+            intercept, slope = sum(offsets) / len(offsets), 0.0
+        residuals = [offset - (intercept + slope * x) for x, offset in zip(elapsed_s, offsets)]
+
+        rtt = LatencyHistogram()
+        forward = LatencyHistogram()
+        backward = LatencyHistogram()
+        negative = 0
+        for send, server, receive in self.samples:
+            offset = intercept + slope * ((send + receive) / 2 - origin) / 1e6
+            forward_us = server - offset - send
+            return_us = receive - (server - offset)
+            if forward_us < 0 or return_us < 0:
+                negative += 1
+            rtt.record(receive - send)
+            forward.record(forward_us)
+            backward.record(return_us)
+
+        last_s = (self.samples[-1][2] - origin) / 1e6
+        results = {
+            'samples': len(self.samples),
+            'windows': len(filtered),
+            'offset_us': intercept,
+            'offset_end_us': intercept + slope * last_s,
+            'drift_ppm': slope if drift_fitted else None,  # µs of offset per second of elapsed time
+            'offset_residual_max_us': max(abs(r) for r in residuals),
+            'min_rtt_us': min(r for _, _, r in filtered),
+            'negative_one_way': negative,
+            'forward_mean_us': forward.mean(),
+            'return_mean_us': backward.mean()
+        }
+        for name, histogram in (('rtt', rtt), ('forward', forward), ('return', backward)):
+            for p, value in zip(ONE_WAY_PERCENTILES, histogram.percentiles(ONE_WAY_PERCENTILES)):
+                results[f"{name}_p{str(p).replace('.', '')}_us"] = value
+        results['asymmetry_p50_us'] = results['forward_p50_us'] - results['return_p50_us']
+        return results
+
+def print_clock_sync(results):
+    print(f"Pings: {results['samples']} in {results.get('windows', 0)} min-RTT windows")
+    if not results['samples']:
+        return
+    print(f"Clock offset (server - client): {results['offset_us']:.1f} µs at start, "
+          f"{results['offset_end_us']:.1f} µs at end")
+    drift = f"{results['drift_ppm']:.3f} ppm" if results['drift_ppm'] is not None else \
+        f"- (needs {MIN_DRIFT_WINDOWS} windows over {MIN_DRIFT_SECONDS} s)"
+    print(f"Drift: {drift}, max residual {results['offset_residual_max_us']:.1f} µs, "
+          f"min RTT {results['min_rtt_us']:.0f} µs")
+    print(f"{'':>8} " + ' '.join(f"{'p' + str(p):>8}" for p in ONE_WAY_PERCENTILES) + f" {'mean':>8}")
+    for name, label in (('rtt', 'RTT'), ('forward', 'forward'), ('return', 'return')):
+        cells = ' '.join(f"{results[f'{name}_p' + str(p).replace('.', '') + '_us'] / 1000:>8.3f}"
+                         for p in ONE_WAY_PERCENTILES)
+        mean = (results['forward_mean_us'] + results['return_mean_us']) if name == 'rtt' \
+            else results[f'{name}_mean_us']
+        print(f"{label:>8} {cells} {mean / 1000:>8.3f}  ms")
+    print(f"Median asymmetry (forward - return): {results['asymmetry_p50_us'] / 1000:.3f} ms")
+    if results['negative_one_way']:
+        print(f"Pings with a negative one-way estimate (clamped to 0): {results['negative_one_way']}")
@@ -1,15 +1,16 @@
 import grpc
 import performance_test_pb2
-import performance_test_pb2_grpc
+from channel_pool import ChannelPool
 from google.protobuf.timestamp_pb2 import Timestamp
 import time
 import uuid
 import threading
 
 class ComprehensiveGrpcTester:
-    def __init__(self, server_address='localhost:50051'):
-        self.channel = grpc.insecure_channel(server_address)
-        self.stub = performance_test_pb2_grpc.PerformanceTestStub(self.channel)
+    def __init__(self, server_address='localhost:50051', channel_pool_size=1, channel_options=None):
+        self.channel_pool = ChannelPool(server_address, channel_pool_size, channel_options)
+        self.channel = self.channel_pool.channels[0]
+        self.stub = self.channel_pool.stub
 
     def _create_timestamp(self):
         now = time.time()
@@ -0,0 +1,272 @@
+# compression_benchmark.py
+
+import argparse
+import asyncio
+import gzip
+import http.client
+import json
+import time
+import zlib
+from urllib.parse import urlsplit
+import performance_test_pb2
+from async_performance_client import AsyncPerformanceTestClient
+from async_rest_client import AsyncRestPerformanceClient
+from payload_pool import PayloadPool, compression_ratio
+from rest_performance_client import PayloadSize
+from wire_accounting import TcpRelay
+
+# Client options per mode; gRPC response compression is set on the server
+# (performance_server.py --compression), REST's by rest_server.py --compress-responses
+MODES = {
+    'grpc': {
+        'none': {},
+        'channel-gzip': {'compression': 'gzip'},
+        'channel-deflate': {'compression': 'deflate'},
+        'call-gzip': {'call_compression': 'gzip'},
+        'call-deflate': {'call_compression': 'deflate'}
+    },
+    # Encoded request bodies (request-*, both-*) need rest_server.py; the C++ server cannot decode them
+    'rest': {
+        'none': {},
+        'request-gzip': {'compression': 'gzip'},
+        'response-gzip': {'accept_encoding': 'gzip'},
+        'both-gzip': {'compression': 'gzip', 'accept_encoding': 'gzip'}
+    }
+}
+
+# Both carry the payload in the request and back in the response
+ECHO_RPCS = {'grpc': 'unary', 'rest': 'echo'}
+
+CODECS = {
+    'gzip': (gzip.compress, gzip.decompress),
+    'deflate': (zlib.compress, zlib.decompress)
+}
+
+def measure_codec_cost(payload, algorithm, level=6, min_seconds=0.2):
+    """CPU milliseconds per MB of payload to compress and to decompress it, outside any RPC"""
+    compress, decompress = CODECS[algorithm]
+    compressed = compress(payload, level)
+
+    def cost(operation):
+        count = 0
+        start = time.process_time()
+        while time.process_time() - start < min_seconds:
+            operation()
+            count += 1
+        return (time.process_time() - start) * 1000 / (count * len(payload) / 1e6)
+
+    return {
+        'algorithm': algorithm,
+        'payload_bytes': len(payload),
+        'compressed_bytes': len(compressed),
+        'ratio': len(payload) / len(compressed),
+        'compress_ms_per_mb': cost(lambda: compress(payload, level)),
+        'decompress_ms_per_mb': cost(lambda: decompress(compressed))
+    }
+
+def rest_server_compresses(rest_target):
+    """Whether the REST server encodes responses for clients that accept gzip"""
+    parts = urlsplit(rest_target)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=5)
+    try:
+        body = json.dumps({'request_id': 'probe', 'payload': 'x' * 4096}).encode()
+        connection.request('POST', '/bidirectional', body,
+                           {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'})
+        response = connection.getresponse()
+        response.read()
+        return response.getheader('Content-Encoding') == 'gzip'
+    except OSError:
+        return False
+    finally:
+        connection.close()
+
+class CompressionBenchmark:
+    """Throughput, client CPU per MB and bytes on the wire for each compression mode.
+
+    Each mode is measured twice: a timed run straight to the server for
+    throughput and CPU, then a short run through a counting TcpRelay for the
+    wire bytes, so the relay's own CPU stays out of the timed run. CPU is the
+    client process only; the server does the mirror-image work.
+    """
+
+    def __init__(self, grpc_target='localhost:50051', rest_target='http://localhost:8080', payload_pool=None,
+                 concurrency=8, duration_seconds=5, warmup_seconds=1, wire_seconds=1):
+        self.targets = {'grpc': grpc_target, 'rest': rest_target}
+        self.payload_pool = payload_pool or PayloadPool([size.value for size in PayloadSize], 'ratio')
+        self.concurrency = concurrency
+        self.duration_seconds = duration_seconds
+        self.warmup_seconds = warmup_seconds
+        self.wire_seconds = wire_seconds
+
+    def _client(self, protocol, target, options):
+        if protocol == 'grpc':
+            return AsyncPerformanceTestClient(target, self.payload_pool, **options)
+        return AsyncRestPerformanceClient(target, self.payload_pool, **options)
+
+    async def _run(self, client, protocol, payload_name, duration_seconds, warmup_seconds):
+        if protocol == 'grpc':
+            levels = await client.measure_concurrency_sweep(
+                [self.concurrency], ECHO_RPCS[protocol], performance_test_pb2.PayloadSize.Value(payload_name),
+                duration_seconds, warmup_seconds)
+        else:
+            levels = await client.measure_concurrency_sweep(
+                [self.concurrency], ECHO_RPCS[protocol], PayloadSize[payload_name],
+                duration_seconds, warmup_seconds=warmup_seconds)
+        return levels[0]
+
+    async def measure(self, protocol, mode, payload_name):
+        options = MODES[protocol][mode]
+        target = self.targets[protocol]
+        result = await self._run(self._client(protocol, target, options), protocol, payload_name,
+                                 self.duration_seconds, self.warmup_seconds)
+
+        with TcpRelay.for_target(target) as relay:
+            relay_target = relay.address if protocol == 'grpc' else relay.url
+            wire = await self._run(self._client(protocol, relay_target, options), protocol, payload_name,
+                                   self.wire_seconds, 0)
+            counters = relay.counters()
+
+        payload = self.payload_pool.get_bytes(PayloadSize[payload_name].value)
+        payload_mb_per_call = 2 * len(payload) / 1e6
+        messages = result['total_messages']
+        elapsed = messages / result['messages_per_second'] if messages else 0
+        cpu_ms = result['client_cpu_percent'] / 100 * elapsed * 1000
+        wire_calls = wire['total_messages'] or 1
+        wire_up = counters['bytes_up'] / wire_calls
+        wire_down = counters['bytes_down'] / wire_calls
+        return {
+            'protocol': protocol,
+            'mode': mode,
+            'payload_size': payload_name,
+            'payload_content': self.payload_pool.label,
+            'payload_ratio': compression_ratio(payload),
+            'concurrency': self.concurrency,
+            'messages_per_second': result['messages_per_second'],
+            'payload_mb_per_second': result['messages_per_second'] * payload_mb_per_call,
+            'p50_latency': result.get('p50_latency', 0),
+            'p99_latency': result.get('p99_latency', 0),
+            'errors': result['errors'] + wire['errors'],
+            'client_cpu_percent': result['client_cpu_percent'],
+            'client_cpu_ms_per_mb': cpu_ms / (messages * payload_mb_per_call) if messages else None,
+            'wire_bytes_up': wire_up,
+            'wire_bytes_down': wire_down,
+            'wire_ratio_up': wire_up / len(payload),
+            'wire_ratio_down': wire_down / len(payload)
+        }
+
+    async def run(self, protocols, payload_names, modes=None):
+        rows = []
+        for payload_name in payload_names:
+            for protocol in protocols:
+                baseline = None
+                for mode in MODES[protocol]:
+                    if modes and mode != 'none' and mode not in modes:
+                        continue
+                    print(f"Measuring {protocol} {mode}, payload size: {payload_name}...")
+                    row = await self.measure(protocol, mode, payload_name)
+                    if mode == 'none':
+                        baseline = row
+                    elif baseline is not None:
+                        row.update(compare_to_baseline(row, baseline))
+                    rows.append(row)
+        return rows
+
+def compare_to_baseline(row, baseline):
+    """Throughput and CPU change against the uncompressed run, and the link speed where they break even.
+
+    Below break_even_mbps the wire time compression saves per call is larger
+    than the client CPU time it adds; None when it saves no bytes, 0 when it
+    costs no CPU.
+    """
+    payload_mb_per_call = row['payload_mb_per_second'] / row['messages_per_second'] \
+        if row['messages_per_second'] else 0
+    saved_bytes = (baseline['wire_bytes_up'] + baseline['wire_bytes_down']) - \
+        (row['wire_bytes_up'] + row['wire_bytes_down'])
+    extra_cpu_ms = None
+    if row['client_cpu_ms_per_mb'] is not None and baseline['client_cpu_ms_per_mb'] is not None:
+        extra_cpu_ms = (row['client_cpu_ms_per_mb'] - baseline['client_cpu_ms_per_mb']) * payload_mb_per_call
+
+    if saved_bytes <= 0 or extra_cpu_ms is None:
+        break_even = None
+    elif extra_cpu_ms <= 0:
+        break_even = 0
+    else:
+        break_even = saved_bytes * 8 / (extra_cpu_ms / 1000) / 1e6
+    return {
+        'throughput_change': row['messages_per_second'] / baseline['messages_per_second'] - 1
+        if baseline['messages_per_second'] else None,
+        'wire_bytes_saved': saved_bytes,
+        'extra_cpu_ms_per_call': extra_cpu_ms,
+        'break_even_mbps': break_even
+    }
+
+def print_codec_costs(costs):
+    print(f"\n{'codec':<8} {'payload':>9} {'ratio':>6} {'compress ms/MB':>15} {'decompress ms/MB':>17}")
+    for c in costs:
+        print(f"{c['algorithm']:<8} {c['payload_bytes']:>9} {c['ratio']:>6.2f} "
+              f"{c['compress_ms_per_mb']:>15.2f} {c['decompress_ms_per_mb']:>17.2f}")
+
+def print_compression_results(rows):
+    print(f"\n{'protocol':<8} {'mode':<16} {'payload':<7} {'msgs/s':>9} {'MB/s':>8} {'p99 ms':>8} "
+          f"{'cpu ms/MB':>10} {'wire up':>6} {'down':>6} {'vs none':>8} {'break-even':>12}")
+    for r in rows:
+        change = r.get('throughput_change')
+        if 'break_even_mbps' not in r:
+            break_even = ''
+        elif r['break_even_mbps'] is None:
+            break_even = 'never'
+        elif r['break_even_mbps'] == 0:
+            break_even = 'always'
+        else:
+            break_even = f"<{r['break_even_mbps']:.0f} Mbit/s"
+        cpu = f"{r['client_cpu_ms_per_mb']:>10.2f}" if r['client_cpu_ms_per_mb'] is not None else f"{'-':>10}"
+        print(f"{r['protocol']:<8} {r['mode']:<16} {r['payload_size']:<7} {r['messages_per_second']:>9.1f} "
+              f"{r['payload_mb_per_second']:>8.2f} {r['p99_latency']:>8.2f} {cpu} "
+              f"{r['wire_ratio_up']:>6.3f} {r['wire_ratio_down']:>6.3f} "
+              f"{f'{change * 100:+.1f}%' if change is not None else '':>8} {break_even:>12}")
+    print("\nwire up/down: bytes on the wire per payload byte (below 1 means compressed). break-even: links "
+          "slower than this\nsave more wire time than the client CPU compression adds (server CPU not included).")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compression cost and benefit for gRPC and REST echo calls")
+    parser.add_argument('--protocol', nargs='+', choices=sorted(MODES), default=['grpc', 'rest'])
+    parser.add_argument('--payload-size', nargs='+', choices=[size.name for size in PayloadSize],
+                        default=['LARGE', 'XLARGE'])
+    parser.add_argument('--payload-content', choices=PayloadPool.CONTENT_MODES, default='ratio')
+    parser.add_argument('--compression-ratio', type=float, default=4.0,
+                        help="Target zlib ratio for --payload-content ratio")
+    parser.add_argument('--mode', nargs='+', choices=sorted({m for modes in MODES.values() for m in modes}),
+                        help="Compression modes to run besides 'none' (default: all)")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--warmup', type=float, default=1)
+    parser.add_argument('--wire-seconds', type=float, default=1)
+    parser.add_argument('--grpc-target', default='localhost:50051')
+    parser.add_argument('--rest-target', default='http://localhost:8080')
+    parser.add_argument('--json', help="Write codec costs and results to this JSON file")
+    args = parser.parse_args()
+
+    payload_pool = PayloadPool([size.value for size in PayloadSize], args.payload_content,
+                               target_ratio=args.compression_ratio)
+    costs = [measure_codec_cost(payload_pool.get_bytes(PayloadSize[name].value), algorithm)
+             for name in args.payload_size for algorithm in CODECS]
+    print(f"Payload content: {payload_pool.label}")
+    print_codec_costs(costs)
+
+    if 'rest' in args.protocol and not rest_server_compresses(args.rest_target):
+        print("\nNote: the REST server does not compress responses; response-gzip modes only add "
+              "Accept-Encoding (start rest_server.py with --compress-responses)")
+    print()
+
+    benchmark = CompressionBenchmark(args.grpc_target, args.rest_target, payload_pool, args.concurrency,
+                                     args.duration, args.warmup, args.wire_seconds)
+    rows = asyncio.run(benchmark.run(args.protocol, args.payload_size, args.mode))
+    print_compression_results(rows)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'codecs': costs, 'results': rows}, f, indent=2)
+        print(f"\nWrote {len(rows)} results to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# latency_histogram.py
+
+import base64
+import math
+import sys
+import zlib
+from array import array
+
+class LatencyHistogram:
+    """Constant-memory, log-bucketed latency histogram (HDR histogram layout).
+
+    Values are recorded as integer microseconds. Every recorded value is kept
+    to `significant_figures` of relative precision, so memory depends only on
+    the trackable range and precision, never on the number of samples.
+    Histograms with the same configuration can be merged, which is how
+    per-thread and per-process recorders are combined.
+    """
+
+    def __init__(self, highest_trackable_us=3_600_000_000, significant_figures=3):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+        self.highest_trackable_us = highest_trackable_us
+        self.significant_figures = significant_figures
+
+        largest_single_unit = 2 * 10 ** significant_figures
+        self._sub_bucket_count_magnitude = (largest_single_unit - 1).bit_length()
+        self._sub_bucket_half_count_magnitude = self._sub_bucket_count_magnitude - 1
+        self._sub_bucket_count = 1 << self._sub_bucket_count_magnitude
+        self._sub_bucket_half_count = self._sub_bucket_count >> 1
+        self._sub_bucket_mask = self._sub_bucket_count - 1
+
+        bucket_count = 1
+        smallest_untrackable = self._sub_bucket_count
+        while smallest_untrackable <= highest_trackable_us:
+            smallest_untrackable <<= 1
+            bucket_count += 1
+        self._counts_length = (bucket_count + 1) * self._sub_bucket_half_count
+        self.reset()
+
+    def reset(self):
+        self.counts = array('Q', bytes(8 * self._counts_length))
+        self.total_count = 0
+        self.total = 0
+        self.total_squares = 0
+        self.min_value = None
+        self.max_value = 0
+
+    def _index(self, value):
+        bucket_index = (value | self._sub_bucket_mask).bit_length() - self._sub_bucket_count_magnitude
+        sub_bucket_index = value >> bucket_index
+        return ((bucket_index + 1) << self._sub_bucket_half_count_magnitude) \
+            + sub_bucket_index - self._sub_bucket_half_count
+
+    def _highest_equivalent(self, index):
+        bucket_index = (index >> self._sub_bucket_half_count_magnitude) - 1
+        sub_bucket_index = (index & (self._sub_bucket_half_count - 1)) + self._sub_bucket_half_count
+        if bucket_index < 0:
+            sub_bucket_index -= self._sub_bucket_half_count
+            bucket_index = 0
+        return (sub_bucket_index << bucket_index) + (1 << bucket_index) - 1
+
+    def record(self, value_us, count=1):
+        """Record a latency in microseconds; values beyond the trackable range are clamped"""
+        value = min(max(int(value_us), 0), self.highest_trackable_us)
+        self.counts[self._index(value)] += count
+        self.total_count += count
+        self.total += value * count
+        self.total_squares += value * value * count
+        if self.min_value is None or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+
+    def merge(self, other):
+        """Add another histogram's samples into this one"""
+        if (other.highest_trackable_us, other.significant_figures) != \
+                (self.highest_trackable_us, self.significant_figures):
+            raise ValueError("Cannot merge histograms with different configurations")
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c:
+                counts[i] += c
+        self.total_count += other.total_count
+        self.total += other.total
+        self.total_squares += other.total_squares
+        if other.min_value is not None and (self.min_value is None or other.min_value < self.min_value):
+            self.min_value = other.min_value
+        self.max_value = max(self.max_value, other.max_value)
+        return self
+
+    def recorded_values(self):
+        """Yield (value_us, count) for every non-empty bucket, in increasing value order"""
+        for index, c in enumerate(self.counts):
+            if c:
+                yield min(self._highest_equivalent(index), self.max_value), c
+
+    def encode(self):
+        """JSON-safe form: settings, running totals and zlib-compressed little-endian counts"""
+        counts = array('Q', self.counts)
+        if sys.byteorder == 'big':
+            counts.byteswap()
+        return {
+            'highest_trackable_us': self.highest_trackable_us,
+            'significant_figures': self.significant_figures,
+            'total_count': self.total_count,
+            'total': self.total,
+            'total_squares': self.total_squares,
+            'min_value': self.min_value,
+            'max_value': self.max_value,
+            'counts': base64.b64encode(zlib.compress(counts.tobytes(), 9)).decode('ascii')
+        }
+
+    @classmethod
+    def decode(cls, data):
+        histogram = cls(data['highest_trackable_us'], data['significant_figures'])
+        counts = array('Q')
+        counts.frombytes(zlib.decompress(base64.b64decode(data['counts'])))
+        if sys.byteorder == 'big':
+            counts.byteswap()
+        if len(counts) != len(histogram.counts):
+            raise ValueError("Encoded counts do not match the histogram configuration")
+        histogram.counts = counts
+        for name in ('total_count', 'total', 'total_squares', 'min_value', 'max_value'):
+            setattr(histogram, name, data[name])
+        return histogram
+
+    def mean(self):
+        return self.total / self.total_count if self.total_count else 0.0
+
+    def stdev(self):
+        if self.total_count < 2:
+            return 0.0
+        variance = (self.total_squares - self.total * self.total / self.total_count) / (self.total_count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def percentiles(self, percentiles):
+        """Return the value (µs) at each requested percentile in a single pass over the buckets"""
+        return self.values_at_ranks([math.ceil(p / 100 * self.total_count) for p in percentiles])
+
+    def values_at_ranks(self, ranks):
+        """Return the value (µs) of the rank-th smallest sample for each rank (1-based, clamped)"""
+        if not self.total_count:
+            return [0 for _ in ranks]
+        targets = sorted((min(max(1, rank), self.total_count), i) for i, rank in enumerate(ranks))
+        values = [0] * len(ranks)
+        cumulative = 0
+        t = 0
+        for index, c in enumerate(self.counts):
+            if not c:
+                continue
+            cumulative += c
+            while t < len(targets) and cumulative >= targets[t][0]:
+                values[targets[t][1]] = min(self._highest_equivalent(index), self.max_value)
+                t += 1
+            if t == len(targets):
+                break
+        return values
+
+    def percentile(self, percentile):
+        return self.percentiles([percentile])[0]
+
+    def percentile_interval(self, percentile, z=1.96):
+        """Distribution-free confidence interval (µs) for a percentile from binomial order statistics"""
+        n = self.total_count
+        q = percentile / 100
+        spread = z * math.sqrt(n * q * (1 - q))
+        low, high = self.values_at_ranks([math.floor(n * q - spread), math.ceil(n * q + spread)])
+        return low, high
+
+    def to_latency_dict(self, percentiles=(95, 99)):
+        """Summarise in milliseconds using the clients' min/max/avg/pNN_latency keys"""
+        if not self.total_count:
+            return {}
+        results = {
+            'min_latency': self.min_value / 1000,
+            'max_latency': self.max_value / 1000,
+            'avg_latency': self.mean() / 1000
+        }
+        for p, value in zip(percentiles, self.percentiles(percentiles)):
+            results[f"p{str(p).replace('.', '')}_latency"] = value / 1000
+        return results
@@ -0,0 +1,57 @@
+# load_report.py
+
+import time
+from array import array
+
+def print_sweep_results(results):
+    """Print concurrency-sweep results from the gRPC or REST async engine as one table"""
+    print(f"{'in-flight':>9} {'conns':>5} {'msgs/s':>10} {'MB/s':>8} {'avg ms':>8} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'cpu %':>6}")
+    for r in results:
+        print(f"{r['concurrency']:>9} {r['connections']:>5} {r['messages_per_second']:>10.2f} "
+              f"{r['bytes_per_second']/1024/1024:>8.2f} {r.get('avg_latency', 0):>8.2f} "
+              f"{r.get('p50_latency', 0):>8.2f} {r.get('p95_latency', 0):>8.2f} "
+              f"{r.get('p99_latency', 0):>8.2f} {r['errors']:>7} {r['client_cpu_percent']:>6.1f}")
+
+class ThroughputTimeline:
+    """Completed-message counts (and latency totals) per fixed interval.
+
+    Gives a run's throughput a series of samples rather than one number, and
+    lets the adaptive runner watch rate and mean latency while the run is live.
+    """
+
+    def __init__(self, interval_seconds=0.1):
+        self.interval_seconds = interval_seconds
+        self._interval_ns = int(interval_seconds * 1e9)
+        self.start()
+
+    def start(self):
+        self._start_ns = time.perf_counter_ns()
+        self.counts = array('Q')
+        self.latency_totals = array('Q')
+
+    def record(self, latency_us=0):
+        index = (time.perf_counter_ns() - self._start_ns) // self._interval_ns
+        counts = self.counts
+        if index >= len(counts):
+            padding = [0] * (index + 1 - len(counts))
+            counts.extend(padding)
+            self.latency_totals.extend(padding)
+        counts[index] += 1
+        self.latency_totals[index] += latency_us
+
+    def elapsed_seconds(self):
+        return (time.perf_counter_ns() - self._start_ns) / 1e9
+
+    def completed_intervals(self):
+        """Number of intervals that have fully elapsed"""
+        return min(int(self.elapsed_seconds() / self.interval_seconds), len(self.counts))
+
+    def rates(self):
+        """Messages per second for each interval; the last, partial interval is left out"""
+        return [c / self.interval_seconds for c in self.counts[:-1]]
+
+    def mean_latencies(self, intervals=None):
+        """Mean latency (µs) of each of the first `intervals` intervals that completed any message"""
+        intervals = len(self.counts) - 1 if intervals is None else intervals
+        return [t / c for c, t in zip(self.counts[:intervals], self.latency_totals[:intervals]) if c]
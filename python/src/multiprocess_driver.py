@@ -0,0 +1,177 @@
+# multiprocess_driver.py
+
+import argparse
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from latency_histogram import LatencyHistogram
+from payload_pool import PayloadPool
+
+DEFAULT_TARGETS = {
+    'grpc': 'localhost:50051',
+    'rest': 'http://localhost:8080'
+}
+
+def _grpc_call(target, scenario, payload_size, content):
+    # Imported here so REST-only runs do not need grpc installed in the workers
+    import performance_test_pb2
+    from performance_client import PerformanceTestClient, PAYLOAD_SIZES
+
+    client = PerformanceTestClient(target, PayloadPool(PAYLOAD_SIZES.values(), content))
+    if scenario == 'ping':
+        def call():
+            client.stub.PingPong(performance_test_pb2.PingRequest(
+                client_id=str(uuid.uuid4()),
+                send_timestamp=client.create_timestamp()
+            ))
+        return call, 0
+
+    size = performance_test_pb2.PayloadSize.Value(payload_size)
+    payload = client.generate_payload(size)
+
+    def call():
+        client.stub.UnaryCall(performance_test_pb2.TestRequest(
+            request_id=str(uuid.uuid4()),
+            timestamp=client.create_timestamp(),
+            payload_size=size,
+            payload=payload
+        ))
+    return call, len(payload)
+
+def _rest_call(target, scenario, payload_size, content):
+    from rest_performance_client import PayloadSize
+    from rest_transport import RestTransport
+
+    transport = RestTransport(target, pool_size=1)
+    if scenario == 'ping':
+        def call():
+            transport.post("/ping", json={
+                'client_id': str(uuid.uuid4()),
+                'send_timestamp': int(time.time() * 1_000_000)
+            })
+        return call, 0
+
+    pool = PayloadPool([size.value for size in PayloadSize], content)
+    payload = pool.get_text(PayloadSize[payload_size].value)
+
+    def call():
+        transport.post("/unary", json={
+            'request_id': str(uuid.uuid4()),
+            'payload': payload
+        })
+    return call, len(payload)
+
+def _run_worker(protocol, scenario, target, payload_size, content, duration_seconds, start_at):
+    """Worker process body: build its own channel/session and run the scenario"""
+    if protocol == 'grpc':
+        call, request_bytes = _grpc_call(target, scenario, payload_size, content)
+    else:
+        call, request_bytes = _rest_call(target, scenario, payload_size, content)
+
+    # Line all workers up on the same wall-clock start so their phases overlap
+    delay = start_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+    histogram = LatencyHistogram()
+    errors = 0
+    cpu_start = time.process_time()
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < duration_seconds:
+        call_start = time.perf_counter_ns()
+        try:
+            call()
+        except Exception:
+            errors += 1
+            continue
+        histogram.record((time.perf_counter_ns() - call_start) // 1000)
+
+    return {
+        'pid': os.getpid(),
+        'histogram': histogram,
+        'total_messages': histogram.total_count,
+        'total_bytes': histogram.total_count * request_bytes,
+        'errors': errors,
+        'elapsed_time': time.perf_counter() - start_time,
+        'cpu_time': time.process_time() - cpu_start
+    }
+
+def merge_worker_results(worker_results):
+    """Combine per-worker latency histograms and counters into one result"""
+    histogram = LatencyHistogram()
+    for r in worker_results:
+        histogram.merge(r['histogram'])
+
+    total_messages = sum(r['total_messages'] for r in worker_results)
+    total_bytes = sum(r['total_bytes'] for r in worker_results)
+    elapsed_time = max(r['elapsed_time'] for r in worker_results)
+
+    merged = {
+        'workers': len(worker_results),
+        'messages_per_second': total_messages / elapsed_time,
+        'bytes_per_second': total_bytes / elapsed_time,
+        'total_messages': total_messages,
+        'total_bytes': total_bytes,
+        'errors': sum(r['errors'] for r in worker_results),
+        'client_cpu_seconds': sum(r['cpu_time'] for r in worker_results),
+        'per_worker_messages_per_second': [
+            r['total_messages'] / r['elapsed_time'] for r in worker_results
+        ]
+    }
+    merged.update(histogram.to_latency_dict())
+    return merged
+
+class MultiProcessDriver:
+    """Runs one scenario in N worker processes against the same target and merges the results"""
+
+    def __init__(self, protocol='grpc', target=None, workers=None):
+        if protocol not in DEFAULT_TARGETS:
+            raise ValueError(f"Unknown protocol: {protocol}")
+        self.protocol = protocol
+        self.target = target or DEFAULT_TARGETS[protocol]
+        self.workers = workers or os.cpu_count()
+
+    def run(self, scenario='unary', payload_size='SMALL', duration_seconds=10, content='random'):
+        # spawn, not fork: gRPC's core threads do not survive a fork
+        context = multiprocessing.get_context('spawn')
+        start_at = time.time() + 2
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(_run_worker, self.protocol, scenario, self.target,
+                            payload_size, content, duration_seconds, start_at)
+                for _ in range(self.workers)
+            ]
+            worker_results = [f.result() for f in futures]
+        return merge_worker_results(worker_results)
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process load driver")
+    parser.add_argument('--protocol', choices=sorted(DEFAULT_TARGETS), default='grpc')
+    parser.add_argument('--target', default=None)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--scenario', choices=['ping', 'unary'], default='unary')
+    parser.add_argument('--payload-size', choices=['SMALL', 'MEDIUM', 'LARGE'], default='SMALL')
+    parser.add_argument('--payload-content', choices=PayloadPool.CONTENT_MODES, default='random')
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    driver = MultiProcessDriver(args.protocol, args.target, args.workers)
+    print(f"Running {args.scenario} ({args.payload_size}) over {args.protocol} "
+          f"with {driver.workers} worker processes...")
+    results = driver.run(args.scenario, args.payload_size, args.duration, args.payload_content)
+
+    print(f"\nMessages per second: {results['messages_per_second']:.2f}")
+    print(f"Throughput: {results['bytes_per_second']/1024/1024:.2f} MB/s")
+    print(f"Total messages: {results['total_messages']}")
+    print(f"Errors: {results['errors']}")
+    print(f"Client CPU time: {results['client_cpu_seconds']:.2f} s")
+    for metric in ['min_latency', 'avg_latency', 'p95_latency', 'p99_latency', 'max_latency']:
+        if metric in results:
+            print(f"{metric}: {results[metric]:.2f} ms")
+    per_worker = ', '.join(f"{rate:.0f}" for rate in results['per_worker_messages_per_second'])
+    print(f"Per-worker messages per second: {per_worker}")
+
+if __name__ == "__main__":
+    main()
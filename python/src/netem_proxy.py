@@ -0,0 +1,217 @@
+# netem_proxy.py
+
+import argparse
+import asyncio
+import random
+import time
+from wire_accounting import TcpRelay, UPSTREAM, DOWNSTREAM
+
+# Bytes per emulated packet when turning a per-packet stall probability into a per-chunk one
+SEGMENT_SIZE = 1448
+
+class NetworkConditions:
+    """One emulated network path: round-trip delay, jitter, a bandwidth cap and random stalls.
+
+    rtt_ms is split evenly between the two directions; jitter_ms is the
+    standard deviation added to each one-way delay. A new connection waits one
+    round trip before it opens, as for a TCP handshake. bandwidth_mbps caps each
+    direction, shared by all connections through the proxy. A stall holds one
+    connection's direction for stall_ms, with probability stall_probability per
+    SEGMENT_SIZE bytes, like a lost packet waiting for retransmission; later
+    data on that connection queues behind it.
+    """
+
+    PRESETS = {
+        'loopback': {},
+        'rtt20': {'rtt_ms': 20},
+        'rtt80': {'rtt_ms': 80},
+        'rtt200': {'rtt_ms': 200}
+    }
+
+    # Spec keys accepted by from_spec
+    SPEC_KEYS = {
+        'rtt': 'rtt_ms',
+        'jitter': 'jitter_ms',
+        'bandwidth': 'bandwidth_mbps',
+        'stall': 'stall_probability',
+        'stall_ms': 'stall_ms'
+    }
+
+    def __init__(self, name, rtt_ms=0, jitter_ms=0, bandwidth_mbps=None, stall_probability=0, stall_ms=200):
+        self.name = name
+        self.rtt_ms = rtt_ms
+        self.jitter_ms = jitter_ms
+        self.bandwidth_mbps = bandwidth_mbps
+        self.stall_probability = stall_probability
+        self.stall_ms = stall_ms
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Parse a preset name or 'name:rtt=80,jitter=5,bandwidth=100,stall=0.001,stall_ms=200'"""
+        if spec in cls.PRESETS:
+            return cls(spec, **cls.PRESETS[spec])
+        name, _, settings = spec.rpartition(':')
+        values = {}
+        for item in filter(None, settings.split(',')):
+            key, _, value = item.partition('=')
+            if key not in cls.SPEC_KEYS:
+                raise ValueError(f"Unknown network setting '{key}' in '{spec}' "
+                                 f"(expected {', '.join(cls.SPEC_KEYS)})")
+            values[cls.SPEC_KEYS[key]] = float(value)
+        return cls(name or settings, **values)
+
+    def to_dict(self):
+        return {
+            'network': self.name,
+            'rtt_ms': self.rtt_ms,
+            'jitter_ms': self.jitter_ms,
+            'bandwidth_mbps': self.bandwidth_mbps,
+            'stall_probability': self.stall_probability,
+            'stall_ms': self.stall_ms
+        }
+
+    def __str__(self):
+        parts = [f"rtt={self.rtt_ms:g}ms"]
+        if self.jitter_ms:
+            parts.append(f"jitter={self.jitter_ms:g}ms")
+        if self.bandwidth_mbps:
+            parts.append(f"bandwidth={self.bandwidth_mbps:g}Mbit/s")
+        if self.stall_probability:
+            parts.append(f"stall={self.stall_probability:g}x{self.stall_ms:g}ms")
+        return f"{self.name} ({' '.join(parts)})"
+
+class _DelayLine:
+    """Chunks of one connection direction waiting for their delivery time"""
+
+    def __init__(self, queue_chunks):
+        self.queue = asyncio.Queue()
+        self.space = asyncio.Semaphore(queue_chunks)
+        self.last_delivery = 0.0
+        self.task = None
+
+class NetemRelay(TcpRelay):
+    """TcpRelay that delivers each chunk after the delay the network conditions give it.
+
+    Chunks are stamped with a delivery time when they arrive and written out
+    by a per-direction task, so the delay is a pipe (many chunks in flight),
+    not a pause per chunk. Delivery order within a connection is kept, as TCP
+    would. At most queue_chunks chunks wait per direction; beyond that the
+    relay stops reading and the sender sees ordinary TCP backpressure.
+
+    The relay's event loop runs on a thread of the calling process, which adds
+    some microseconds per chunk; use main() to run it as a separate process
+    when that matters.
+    """
+
+    def __init__(self, target_host, target_port, conditions, seed=None, queue_chunks=256, **kwargs):
+        super().__init__(target_host, target_port, **kwargs)
+        self.conditions = conditions
+        self.queue_chunks = queue_chunks
+        self.random = random.Random(seed)
+        self.stalls = 0
+        self._link_free = {UPSTREAM: 0.0, DOWNSTREAM: 0.0}
+        self._lines = {}
+
+    def _one_way_delay(self):
+        delay = self.conditions.rtt_ms / 2000
+        if self.conditions.jitter_ms:
+            delay = max(delay + self.random.gauss(0, self.conditions.jitter_ms / 1000), 0)
+        return delay
+
+    async def connect_delay(self):
+        # The handshake's SYN and SYN-ACK: the client's first bytes wait behind it
+        delay = self._one_way_delay() + self._one_way_delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _delivery_time(self, line, size, direction):
+        conditions = self.conditions
+        now = asyncio.get_running_loop().time()
+        sent = now
+        if conditions.bandwidth_mbps:
+            start = max(now, self._link_free[direction])
+            sent = start + size * 8 / (conditions.bandwidth_mbps * 1e6)
+            self._link_free[direction] = sent
+
+        delivery = max(sent + self._one_way_delay(), line.last_delivery)
+
+        if conditions.stall_probability:
+            segments = -(-size // SEGMENT_SIZE)
+            if self.random.random() < 1 - (1 - conditions.stall_probability) ** segments:
+                delivery += conditions.stall_ms / 1000
+                self.stalls += 1
+        line.last_delivery = delivery
+        return delivery
+
+    async def _deliver(self, line, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                delivery, data = await line.queue.get()
+                if data is None:
+                    if writer.can_write_eof():
+                        writer.write_eof()
+                    return
+                wait = delivery - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                writer.write(data)
+                await writer.drain()
+                line.space.release()
+        except (ConnectionError, OSError):
+            writer.close()
+
+    def _line(self, writer):
+        line = self._lines.get(writer)
+        if line is None:
+            line = self._lines[writer] = _DelayLine(self.queue_chunks)
+            line.task = asyncio.get_running_loop().create_task(self._deliver(line, writer))
+            self._tasks.add(line.task)
+            line.task.add_done_callback(self._tasks.discard)
+        return line
+
+    async def forward(self, data, direction, writer):
+        line = self._line(writer)
+        await line.space.acquire()
+        line.queue.put_nowait((self._delivery_time(line, len(data), direction), data))
+
+    async def end_of_stream(self, direction, writer):
+        line = self._line(writer)
+        line.queue.put_nowait((line.last_delivery, None))
+        await line.task
+
+    async def _pump(self, reader, writer, direction):
+        try:
+            await super()._pump(reader, writer, direction)
+        finally:
+            line = self._lines.pop(writer, None)
+            if line is not None:
+                line.task.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description="TCP proxy that emulates latency, jitter, bandwidth and stalls")
+    parser.add_argument('--target', default='localhost:50051', help="host:port or http://host:port to forward to")
+    parser.add_argument('--listen-host', default='127.0.0.1')
+    parser.add_argument('--listen-port', type=int, default=0)
+    parser.add_argument('--network', default='rtt80',
+                        help=f"Preset ({', '.join(NetworkConditions.PRESETS)}) or "
+                             f"'name:rtt=80,jitter=5,bandwidth=100,stall=0.001,stall_ms=200'")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    conditions = NetworkConditions.from_spec(args.network)
+    relay = NetemRelay.for_target(args.target, conditions=conditions, seed=args.seed,
+                                  listen_host=args.listen_host, listen_port=args.listen_port).start()
+    print(f"Forwarding {relay.address} -> {args.target} with {conditions}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    relay.stop()
+    counters = relay.counters()
+    print(f"\n{counters['connections']} connections, {counters['bytes_up']} bytes up, "
+          f"{counters['bytes_down']} bytes down, {relay.stalls} stalls")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# open_loop.py
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from latency_histogram import LatencyHistogram
+
+OPEN_LOOP_PERCENTILES = (50, 90, 99, 99.9)
+
+class OpenLoopScheduler:
+    """Constant-arrival-rate load generator with coordinated-omission correction.
+
+    Requests are released on a fixed schedule regardless of how long earlier
+    requests take. Corrected latency is measured from each request's scheduled
+    send time, so a server stall also counts against every request that should
+    have been sent during it; uncorrected latency is measured from the moment
+    the request actually left the client.
+    """
+
+    def __init__(self, rate, duration_seconds=10, max_workers=64):
+        self.rate = rate
+        self.duration_seconds = duration_seconds
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._recorders = []
+        self._recorders_lock = threading.Lock()
+
+    def _thread_recorders(self):
+        # One (corrected, uncorrected, errors) recorder per worker thread, merged after the run
+        recorders = getattr(self._local, 'recorders', None)
+        if recorders is None:
+            recorders = [LatencyHistogram(), LatencyHistogram(), 0]
+            self._local.recorders = recorders
+            with self._recorders_lock:
+                self._recorders.append(recorders)
+        return recorders
+
+    def _timed_send(self, send, scheduled_ns):
+        recorders = self._thread_recorders()
+        actual_ns = time.perf_counter_ns()
+        try:
+            send()
+        except Exception:
+            recorders[2] += 1
+            return
+        end_ns = time.perf_counter_ns()
+        recorders[0].record((end_ns - scheduled_ns) // 1000)
+        recorders[1].record((end_ns - actual_ns) // 1000)
+
+    def run(self, send):
+        """Call the blocking `send` callable at the target rate and time every call"""
+        self._local = threading.local()
+        self._recorders = []
+        interval_ns = 1_000_000_000 / self.rate
+        total_requests = int(self.rate * self.duration_seconds)
+        max_dispatch_lag_ns = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            start_ns = time.perf_counter_ns()
+            for i in range(total_requests):
+                scheduled_ns = start_ns + int(i * interval_ns)
+                now_ns = time.perf_counter_ns()
+                if scheduled_ns > now_ns:
+                    time.sleep((scheduled_ns - now_ns) / 1_000_000_000)
+                else:
+                    # Dispatcher fell behind; the request still counts from its schedule
+                    max_dispatch_lag_ns = max(max_dispatch_lag_ns, now_ns - scheduled_ns)
+                pool.submit(self._timed_send, send, scheduled_ns)
+        elapsed_time = (time.perf_counter_ns() - start_ns) / 1_000_000_000
+
+        corrected = LatencyHistogram()
+        uncorrected = LatencyHistogram()
+        errors = 0
+        for thread_corrected, thread_uncorrected, thread_errors in self._recorders:
+            corrected.merge(thread_corrected)
+            uncorrected.merge(thread_uncorrected)
+            errors += thread_errors
+
+        return {
+            'target_rate': self.rate,
+            'achieved_rate': corrected.total_count / elapsed_time,
+            'total_requests': total_requests,
+            'errors': errors,
+            'max_dispatch_lag_ms': max_dispatch_lag_ns / 1_000_000,
+            'corrected': corrected.to_latency_dict(OPEN_LOOP_PERCENTILES),
+            'uncorrected': uncorrected.to_latency_dict(OPEN_LOOP_PERCENTILES)
+        }
+
+def print_open_loop_results(results):
+    print(f"Target rate: {results['target_rate']:.0f} req/s, "
+          f"achieved: {results['achieved_rate']:.2f} req/s, errors: {results['errors']}")
+    print(f"Max dispatch lag: {results['max_dispatch_lag_ms']:.2f} ms")
+    print(f"{'metric':<14} {'corrected':>12} {'uncorrected':>12}")
+    for metric, value in results['corrected'].items():
+        print(f"{metric:<14} {value:>9.2f} ms {results['uncorrected'][metric]:>9.2f} ms")
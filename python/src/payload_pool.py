@@ -0,0 +1,122 @@
+# payload_pool.py
+
+import random
+import zlib
+
+DEFAULT_PAYLOAD_SIZES = (0, 1024, 10240, 102400, 1048576)
+
+# 64 JSON-safe characters: payload bytes are sent unchanged by both gRPC and REST
+_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+_RANDOM_TABLE = bytes(_ALPHABET[i % 64] for i in range(256))
+_COMPRESSIBLE_PATTERN = b'grpc-vs-rest benchmark payload '
+
+# 'ratio' content: each block is `literal` random characters followed by filler
+# zlib can replace with back-references; literal is calibrated on a sample
+_RATIO_BLOCK = 256
+_RATIO_SAMPLE = 65536
+# Random characters from a 64-symbol alphabet carry 6 bits per byte, so this is
+# about the least compressible the ASCII content can be
+MIN_COMPRESSION_RATIO = 1.3
+
+def compression_ratio(data, level=6):
+    """Uncompressed / zlib-compressed size at the given level"""
+    return len(data) / len(zlib.compress(data, level)) if data else 1.0
+
+class PayloadPool:
+    """Pre-generated request payloads shared by the gRPC and REST clients.
+
+    One backing buffer is generated at startup and one payload per size is
+    cut from it, so send loops hand out the same objects every time instead
+    of allocating. Content is ASCII, so the bytes a gRPC request carries are
+    exactly the characters a REST request carries in its JSON string.
+
+    'random' content barely compresses (ratio ~1.3), 'compressible' and
+    'fixed' compress to almost nothing, and 'ratio' is tuned so zlib/gzip at
+    the default level shrinks it by about target_ratio (payloads of a few KB
+    land below it, where the compressed stream's fixed cost dominates).
+    """
+
+    CONTENT_MODES = ('random', 'compressible', 'fixed', 'ratio')
+
+    def __init__(self, sizes=DEFAULT_PAYLOAD_SIZES, content='random', seed=0, target_ratio=4.0):
+        if content not in self.CONTENT_MODES:
+            raise ValueError(f"Unknown payload content: {content}")
+        if content == 'ratio' and target_ratio < MIN_COMPRESSION_RATIO:
+            raise ValueError(f"Compression ratio must be at least {MIN_COMPRESSION_RATIO}")
+        self.content = content
+        self.seed = seed
+        self.target_ratio = target_ratio
+        self._literal = self._calibrate_literal() if content == 'ratio' else None
+        self._buffer = self._generate(max(sizes, default=0))
+        self._payloads = {}
+        self._texts = {}
+        for size in sizes:
+            self.add_size(size)
+
+    @property
+    def label(self):
+        """Content mode as recorded with results, e.g. 'ratio:4'"""
+        return f"ratio:{self.target_ratio:g}" if self.content == 'ratio' else self.content
+
+    def _ratio_content(self, size, literal):
+        rng = random.Random(self.seed)
+        filler = _COMPRESSIBLE_PATTERN * (_RATIO_BLOCK // len(_COMPRESSIBLE_PATTERN) + 1)
+        blocks = []
+        for _ in range(size // _RATIO_BLOCK + 1):
+            blocks.append(rng.randbytes(literal).translate(_RANDOM_TABLE))
+            blocks.append(filler[:_RATIO_BLOCK - literal])
+        return b''.join(blocks)[:size]
+
+    def _calibrate_literal(self):
+        """Random characters per block whose zlib ratio is closest to target_ratio"""
+        low, high = 0, _RATIO_BLOCK
+        while high - low > 1:
+            middle = (low + high) // 2
+            if compression_ratio(self._ratio_content(_RATIO_SAMPLE, middle)) > self.target_ratio:
+                low = middle
+            else:
+                high = middle
+        return min((low, high), key=lambda literal: abs(
+            compression_ratio(self._ratio_content(_RATIO_SAMPLE, literal)) - self.target_ratio))
+
+    def _generate(self, size):
+        if self.content == 'random':
+            return random.Random(self.seed).randbytes(size).translate(_RANDOM_TABLE)
+        if self.content == 'ratio':
+            return self._ratio_content(size, self._literal)
+        if self.content == 'compressible':
+            repeats = size // len(_COMPRESSIBLE_PATTERN) + 1
+            return (_COMPRESSIBLE_PATTERN * repeats)[:size]
+        return b'x' * size
+
+    def add_size(self, size):
+        """Pre-allocate a payload for a custom size (grows the backing buffer if needed)"""
+        if size in self._payloads:
+            return
+        if size > len(self._buffer):
+            self._buffer = self._generate(size)
+            # Re-cut existing sizes so every payload stays a prefix of the same buffer
+            self._payloads = {s: self._buffer[:s] for s in self._payloads}
+            self._texts = {s: p.decode('ascii') for s, p in self._payloads.items()}
+        self._payloads[size] = self._buffer[:size]
+        self._texts[size] = self._payloads[size].decode('ascii')
+
+    def get_bytes(self, size):
+        """Payload as bytes (gRPC `bytes` fields); the same object is returned on every call"""
+        payload = self._payloads.get(size)
+        if payload is None:
+            self.add_size(size)
+            payload = self._payloads[size]
+        return payload
+
+    def get_text(self, size):
+        """Payload as str (REST JSON bodies); identical characters to get_bytes(size)"""
+        text = self._texts.get(size)
+        if text is None:
+            self.add_size(size)
+            text = self._texts[size]
+        return text
+
+    def get_view(self, size):
+        """Zero-copy memoryview over the backing buffer, for raw-bytes send paths"""
+        return memoryview(self.get_bytes(size))
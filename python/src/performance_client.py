@@ -1,18 +1,61 @@
 import grpc
 import performance_test_pb2
-import performance_test_pb2_grpc
 from google.protobuf.timestamp_pb2 import Timestamp
 import time
 import uuid
-import statistics
-import os
 import threading
+import queue
 from concurrent.futures import ThreadPoolExecutor
+from open_loop import OpenLoopScheduler, print_open_loop_results
+from latency_histogram import LatencyHistogram
+from payload_pool import PayloadPool
+from grpc_fast_path import TestRequestTemplate, raw_unary_call, parse_response
+from channel_pool import ChannelPool
+from streaming_analysis import StreamArrivalRecorder, print_stream_analysis
+from clock_sync import ClockSyncEstimator, print_clock_sync, paced_pings, SYNC_SECONDS, SYNC_PINGS_PER_SECOND
+from client_metrics import MetricsClientInterceptor
+
+PAYLOAD_SIZES = {
+    performance_test_pb2.EMPTY: 0,
+    performance_test_pb2.SMALL: 1024,
+    performance_test_pb2.MEDIUM: 10240,
+    performance_test_pb2.LARGE: 102400,
+    performance_test_pb2.XLARGE: 1048576
+}
+
+def build_request_ring(payload_size, payload, ring_size=1024):
+    """Pre-built TestRequests that ingest loops cycle through instead of constructing per message"""
+    now = time.time()
+    return [
+        performance_test_pb2.TestRequest(
+            request_id=f"ingest-{i}",
+            timestamp=Timestamp(seconds=int(now), nanos=int((now - int(now)) * 1e9)),
+            payload_size=payload_size,
+            payload=payload
+        ) for i in range(ring_size)
+    ]
+
+def ingest_results(message_count, messages_processed, payload_bytes, elapsed_time, cpu_time, producer):
+    return {
+        'producer': producer,
+        'messages_sent': message_count,
+        'messages_processed': messages_processed,
+        'verified': messages_processed == message_count,
+        'messages_per_second': message_count / elapsed_time,
+        'bytes_per_second': message_count * payload_bytes / elapsed_time,
+        'client_cpu_us_per_message': cpu_time / message_count * 1_000_000,
+        'elapsed_time': elapsed_time
+    }
 
 class PerformanceTestClient:
-    def __init__(self, server_address='localhost:50051'):
-        self.channel = grpc.insecure_channel(server_address)
-        self.stub = performance_test_pb2_grpc.PerformanceTestStub(self.channel)
+    def __init__(self, server_address='localhost:50051', payload_pool=None,
+                 channel_pool_size=1, channel_options=None, metrics=None):
+        interceptors = [MetricsClientInterceptor(metrics)] if metrics is not None else []
+        self.channel_pool = ChannelPool(server_address, channel_pool_size, channel_options, interceptors)
+        self.channel = self.channel_pool.channels[0]
+        self.stub = self.channel_pool.stub
+        self.payload_pool = payload_pool or PayloadPool(PAYLOAD_SIZES.values())
+        self.raw_unary_call = raw_unary_call(self.channel)
 
     def create_timestamp(self):
         now = time.time()
@@ -22,20 +65,13 @@ class PerformanceTestClient:
         return timestamp
 
     def generate_payload(self, size):
-        sizes = {
-            performance_test_pb2.EMPTY: 0,
-            performance_test_pb2.SMALL: 1024,
-            performance_test_pb2.MEDIUM: 10240,
-            performance_test_pb2.LARGE: 102400,
-            performance_test_pb2.XLARGE: 1048576
-        }
-        return os.urandom(sizes[size])
+        return self.payload_pool.get_bytes(PAYLOAD_SIZES[size])
 
     def measure_latency(self, iterations=1000):
-        latencies = []
+        histogram = LatencyHistogram()
         
         for _ in range(iterations):
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             
             request = performance_test_pb2.PingRequest(
                 client_id=str(uuid.uuid4()),
@@ -44,17 +80,37 @@ class PerformanceTestClient:
             
             response = self.stub.PingPong(request)
             
-            end_time = time.time()
-            latency = (end_time - start_time) * 1000
-            latencies.append(latency)
+            end_time = time.perf_counter_ns()
+            histogram.record((end_time - start_time) // 1000)
         
-        return {
-            'min_latency': min(latencies),
-            'max_latency': max(latencies),
-            'avg_latency': statistics.mean(latencies),
-            'p95_latency': statistics.quantiles(latencies, n=20)[18],
-            'p99_latency': statistics.quantiles(latencies, n=100)[98]
-        }
+        return histogram.to_latency_dict()
+
+    def measure_latency_open_loop(self, rate, duration_seconds=10, max_workers=64):
+        """Send PingPong at a constant arrival rate and report corrected and uncorrected latency"""
+        def send():
+            request = performance_test_pb2.PingRequest(
+                client_id=str(uuid.uuid4()),
+                send_timestamp=self.create_timestamp()
+            )
+            self.stub.PingPong(request)
+
+        scheduler = OpenLoopScheduler(rate, duration_seconds, max_workers)
+        return scheduler.run(send)
+
+    def measure_clock_sync(self, duration_seconds=SYNC_SECONDS, rate=SYNC_PINGS_PER_SECOND, window_size=100):
+        """PingPong paced over duration_seconds, with NTP-style clock offset/drift and forward/return latency"""
+        estimator = ClockSyncEstimator(window_size)
+        for _ in paced_pings(duration_seconds, rate):
+            request = performance_test_pb2.PingRequest(
+                client_id=str(uuid.uuid4()),
+                send_timestamp=self.create_timestamp()
+            )
+            # t0 and t3 bracket only the call, so request building is not counted as network time
+            sent_ns = time.time_ns()
+            response = self.stub.PingPong(request)
+            received_ns = time.time_ns()
+            estimator.add(sent_ns / 1000, response.server_timestamp.ToNanoseconds() / 1000, received_ns / 1000)
+        return estimator.analyze()
 
     def measure_throughput(self, payload_size, duration_seconds=10):
         messages_sent = 0
@@ -81,6 +137,173 @@ class PerformanceTestClient:
             'total_bytes': bytes_sent
         }
 
+    def measure_streaming_throughput(self, payload_size, duration_seconds=10, window=64):
+        """Throughput over one BidirectionalStreaming call with up to `window` unacknowledged messages"""
+        payload = self.generate_payload(payload_size)
+        window_slots = threading.Semaphore(window)
+        send_times = {}
+        stop = threading.Event()
+        histogram = LatencyHistogram()
+        
+        def request_generator():
+            sequence = 0
+            while True:
+                window_slots.acquire()
+                if stop.is_set():
+                    return
+                request_id = str(sequence)
+                send_times[request_id] = time.perf_counter_ns()
+                yield performance_test_pb2.TestRequest(
+                    request_id=request_id,
+                    timestamp=self.create_timestamp(),
+                    payload_size=payload_size,
+                    payload=payload
+                )
+                sequence += 1
+        
+        start_time = time.time()
+        # Echoed responses are matched to their request by request_id for per-message latency
+        for response in self.stub.BidirectionalStreaming(request_generator()):
+            sent = send_times.pop(response.request_id, None)
+            if sent is not None:
+                histogram.record((time.perf_counter_ns() - sent) // 1000)
+            if not stop.is_set() and time.time() - start_time >= duration_seconds:
+                stop.set()
+            window_slots.release()
+        elapsed_time = time.time() - start_time
+        
+        messages = histogram.total_count
+        results = {
+            'window': window,
+            'messages_per_second': messages / elapsed_time,
+            'bytes_per_second': messages * len(payload) / elapsed_time,
+            'total_messages': messages,
+            'total_bytes': messages * len(payload)
+        }
+        results.update(histogram.to_latency_dict())
+        return results
+
+    def measure_client_streaming_ingest(self, message_count=1_000_000, payload_size=performance_test_pb2.SMALL,
+                                        producer='inline', queue_size=1024):
+        """Push pre-built TestRequests through one ClientStreaming call as fast as flow control allows"""
+        payload = self.generate_payload(payload_size)
+        ring = build_request_ring(payload_size, payload)
+        ring_size = len(ring)
+        
+        if producer == 'inline':
+            def request_iterator():
+                for i in range(message_count):
+                    yield ring[i % ring_size]
+        elif producer == 'thread':
+            # Bounded queue: the producer thread blocks when gRPC flow control holds the stream back
+            pending = queue.Queue(maxsize=queue_size)
+            
+            def produce():
+                for i in range(message_count):
+                    pending.put(ring[i % ring_size])
+                pending.put(None)
+            
+            def request_iterator():
+                producer_thread = threading.Thread(target=produce, daemon=True)
+                producer_thread.start()
+                while True:
+                    request = pending.get()
+                    if request is None:
+                        return
+                    yield request
+        else:
+            raise ValueError(f"Unknown producer: {producer}")
+        
+        cpu_start = time.process_time()
+        start_time = time.perf_counter()
+        response = self.stub.ClientStreaming(request_iterator())
+        elapsed_time = time.perf_counter() - start_time
+        cpu_time = time.process_time() - cpu_start
+        
+        return ingest_results(message_count, response.messages_processed, len(payload),
+                              elapsed_time, cpu_time, producer)
+
+    def measure_throughput_per_channel(self, payload_size, duration_seconds=10, concurrency=None):
+        """Unary throughput from concurrent threads spread round-robin over the channel pool"""
+        pool = self.channel_pool
+        concurrency = concurrency or pool.size * 4
+        payload = self.generate_payload(payload_size)
+        pool.reset_stats()
+        
+        def worker():
+            while time.time() - start_time < duration_seconds:
+                request = performance_test_pb2.TestRequest(
+                    request_id=str(uuid.uuid4()),
+                    timestamp=self.create_timestamp(),
+                    payload_size=payload_size,
+                    payload=payload
+                )
+                try:
+                    pool.timed_call('UnaryCall', request, len(payload))
+                except grpc.RpcError:
+                    pass
+        
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(concurrency):
+                executor.submit(worker)
+        elapsed_time = time.time() - start_time
+        
+        channels = pool.channel_stats(elapsed_time)
+        total_messages = sum(c['total_messages'] for c in channels)
+        return {
+            'channel_pool_size': pool.size,
+            'concurrency': concurrency,
+            'messages_per_second': total_messages / elapsed_time,
+            'bytes_per_second': total_messages * len(payload) / elapsed_time,
+            'total_messages': total_messages,
+            'channels': channels
+        }
+
+    def measure_throughput_fast(self, payload_size, duration_seconds=10, parse='none'):
+        """Unary throughput from a pre-serialized template through an identity-serializer stub"""
+        template = TestRequestTemplate(payload_size, self.generate_payload(payload_size))
+        payload_bytes = PAYLOAD_SIZES[payload_size]
+        messages_sent = 0
+        start_time = time.time()
+        
+        while time.time() - start_time < duration_seconds:
+            response = parse_response(self.raw_unary_call(template.render()), parse)
+            messages_sent += 1
+        
+        elapsed_time = time.time() - start_time
+        return {
+            'messages_per_second': messages_sent / elapsed_time,
+            'bytes_per_second': messages_sent * payload_bytes / elapsed_time,
+            'total_messages': messages_sent,
+            'total_bytes': messages_sent * payload_bytes
+        }
+
+    def measure_serialization_cost(self, payload_size, iterations=10000):
+        """Client-side cost of producing request bytes, without any transport"""
+        payload = self.generate_payload(payload_size)
+        
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            performance_test_pb2.TestRequest(
+                request_id=str(uuid.uuid4()),
+                timestamp=self.create_timestamp(),
+                payload_size=payload_size,
+                payload=payload
+            ).SerializeToString()
+        build_serialize_ns = time.perf_counter_ns() - start
+        
+        template = TestRequestTemplate(payload_size, payload)
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            template.render()
+        template_ns = time.perf_counter_ns() - start
+        
+        return {
+            'build_serialize_us': build_serialize_ns / iterations / 1000,
+            'template_render_us': template_ns / iterations / 1000
+        }
+
     def test_streaming(self, message_count=100, payload_size=performance_test_pb2.SMALL, interval_ms=100):
         request = performance_test_pb2.StreamRequest(
             message_count=message_count,
@@ -90,14 +313,22 @@ class PerformanceTestClient:
         
         print(f"\nTesting server streaming with {message_count} messages...")
         messages_received = 0
+        recorder = StreamArrivalRecorder(interval_ms)
         start_time = time.time()
+        recorder.start()
         
         for response in self.stub.ServerStreaming(request):
+            recorder.record(int(response.request_id),
+                            response.processed_at.seconds * 1_000_000 + response.processed_at.nanos // 1000)
             messages_received += 1
             
         elapsed_time = time.time() - start_time
         print(f"Received {messages_received} messages in {elapsed_time:.2f} seconds")
         print(f"Average throughput: {messages_received/elapsed_time:.2f} messages/second")
+        
+        analysis = recorder.analyze()
+        print_stream_analysis(analysis)
+        return analysis
 
     def test_batch_processing(self, batch_size=10, parallel=True):
         requests = []
@@ -136,6 +367,16 @@ def main():
     for metric, value in latency_results.items():
         print(f"{metric}: {value:.2f} ms")
 
+    # 1b Test open-loop latency at fixed arrival rates
+    print("\nTesting open-loop latency...")
+    for rate in [2000, 5000, 10000]:
+        print()
+        print_open_loop_results(client.measure_latency_open_loop(rate, duration_seconds=10))
+
+    # 1c Estimate clock offset and split RTT into one-way latencies
+    print("\nTesting clock offset and one-way latency...")
+    print_clock_sync(client.measure_clock_sync())
+
     # 2 Test throughput with different payload sizes
     print("\nTesting throughput with different payload sizes...")
     payload_sizes = [
@@ -152,6 +393,55 @@ def main():
         print(f"Total messages: {results['total_messages']}")
         print(f"Total data: {results['total_bytes']/1024/1024:.2f} MB")
 
+        stream_results = client.measure_streaming_throughput(size, duration_seconds=10)
+        print(f"Bidi stream messages per second: {stream_results['messages_per_second']:.2f} "
+              f"(window {stream_results['window']})")
+        print(f"Bidi stream throughput: {stream_results['bytes_per_second']/1024/1024:.2f} MB/s")
+        if stream_results['total_messages']:
+            print(f"Bidi stream latency: avg {stream_results['avg_latency']:.2f} ms, "
+                  f"p99 {stream_results['p99_latency']:.2f} ms")
+        else:
+            print("Bidi stream latency: no messages completed")
+
+        fast_results = client.measure_throughput_fast(size, duration_seconds=10)
+        print(f"Fast path messages per second: {fast_results['messages_per_second']:.2f}")
+        print(f"Fast path throughput: {fast_results['bytes_per_second']/1024/1024:.2f} MB/s")
+
+        cost = client.measure_serialization_cost(size)
+        print(f"Build + serialize per request: {cost['build_serialize_us']:.2f} µs")
+        print(f"Template render per request: {cost['template_render_us']:.2f} µs")
+
+    # 2b Find where a single connection stops scaling for larger payloads
+    print("\nTesting throughput per channel pool size...")
+    for size in [performance_test_pb2.MEDIUM, performance_test_pb2.LARGE]:
+        for pool_size in [1, 2, 4, 8]:
+            pooled_client = PerformanceTestClient(channel_pool_size=pool_size,
+                                                  payload_pool=client.payload_pool)
+            results = pooled_client.measure_throughput_per_channel(size, duration_seconds=10)
+            pooled_client.channel_pool.close()
+            print(f"\nPayload size: {performance_test_pb2.PayloadSize.Name(size)}, "
+                  f"channels: {pool_size}, threads: {results['concurrency']}")
+            print(f"Messages per second: {results['messages_per_second']:.2f}")
+            print(f"Throughput: {results['bytes_per_second']/1024/1024:.2f} MB/s")
+            for channel in results['channels']:
+                print(f"  channel {channel['channel']}: {channel['messages_per_second']:.2f} msg/s, "
+                      f"{channel['bytes_per_second']/1024/1024:.2f} MB/s, "
+                      f"p99 {channel.get('p99_latency', 0):.2f} ms")
+
+    # 2c Client streaming ingest (telemetry-upload pattern)
+    print("\nTesting client streaming ingest...")
+    for producer in ['inline', 'thread']:
+        results = client.measure_client_streaming_ingest(message_count=1_000_000,
+                                                         payload_size=performance_test_pb2.SMALL,
+                                                         producer=producer)
+        print(f"\nProducer: {producer}")
+        print(f"Messages sent: {results['messages_sent']}, "
+              f"processed by server: {results['messages_processed']} "
+              f"({'verified' if results['verified'] else 'MISMATCH'})")
+        print(f"Ingest rate: {results['messages_per_second']:.2f} messages/second")
+        print(f"Throughput: {results['bytes_per_second']/1024/1024:.2f} MB/s")
+        print(f"Client CPU per message: {results['client_cpu_us_per_message']:.2f} µs")
+
     # 3 Test streaming (kind of optional but good to have for the grpc)
     print("\nTesting streaming performance...")
     client.test_streaming(message_count=1000, 
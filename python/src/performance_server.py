@@ -0,0 +1,203 @@
+# performance_server.py
+
+import argparse
+import asyncio
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+import grpc
+import performance_test_pb2
+import performance_test_pb2_grpc
+from google.protobuf.timestamp_pb2 import Timestamp
+from channel_pool import MAX_MESSAGE_LENGTH, COMPRESSION_ALGORITHMS
+from performance_client import PAYLOAD_SIZES
+
+# Server-streaming payloads are built once, like the C++ server's std::string(size, 'x')
+STREAM_PAYLOADS = {size: b'x' * length for size, length in PAYLOAD_SIZES.items()}
+
+def _now():
+    timestamp = Timestamp()
+    timestamp.FromNanoseconds(time.time_ns())
+    return timestamp
+
+def collect_metrics(start_ns, cpu_start_ns):
+    """ProcessingMetrics for work that started at start_ns (perf counter) / cpu_start_ns (thread CPU).
+
+    cpu_usage carries the CPU time, in microseconds, that the handling thread
+    spent on the call; processing_time_us is the wall-clock time.
+    """
+    return performance_test_pb2.ProcessingMetrics(
+        processing_time_us=(time.perf_counter_ns() - start_ns) // 1000,
+        memory_used_bytes=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        cpu_usage=(time.thread_time_ns() - cpu_start_ns) / 1000
+    )
+
+def echo_response(request):
+    """Build the TestResponse the C++ server returns for UnaryCall/Bidirectional/Batch"""
+    start_ns = time.perf_counter_ns()
+    cpu_start_ns = time.thread_time_ns()
+    response = performance_test_pb2.TestResponse(
+        request_id=request.request_id,
+        received_at=_now(),
+        payload=request.payload
+    )
+    response.processed_at.CopyFrom(_now())
+    response.metrics.CopyFrom(collect_metrics(start_ns, cpu_start_ns))
+    return response
+
+def stream_response(index, payload_size):
+    response = performance_test_pb2.TestResponse(
+        request_id=str(index),
+        payload=STREAM_PAYLOADS.get(payload_size, b''),
+        received_at=_now()
+    )
+    response.processed_at.CopyFrom(_now())
+    return response
+
+def pong_response(request):
+    return performance_test_pb2.PongResponse(
+        client_id=request.client_id,
+        client_timestamp=request.send_timestamp,
+        server_timestamp=_now()
+    )
+
+class AsyncPerformanceTestServicer(performance_test_pb2_grpc.PerformanceTestServicer):
+    """Every RPC runs as a coroutine on the server's event loop"""
+
+    async def UnaryCall(self, request, context):
+        return echo_response(request)
+
+    async def ServerStreaming(self, request, context):
+        for i in range(request.message_count):
+            yield stream_response(i, request.payload_size)
+            if request.interval_ms > 0:
+                await asyncio.sleep(request.interval_ms / 1000)
+
+    async def ClientStreaming(self, request_iterator, context):
+        start_ns = time.perf_counter_ns()
+        cpu_start_ns = time.thread_time_ns()
+        count = 0
+        async for _ in request_iterator:
+            count += 1
+        return performance_test_pb2.StreamResponse(
+            messages_processed=count,
+            aggregate_metrics=collect_metrics(start_ns, cpu_start_ns)
+        )
+
+    async def BidirectionalStreaming(self, request_iterator, context):
+        async for request in request_iterator:
+            yield echo_response(request)
+
+    async def PingPong(self, request, context):
+        return pong_response(request)
+
+    async def BatchProcess(self, request, context):
+        start_ns = time.perf_counter_ns()
+        cpu_start_ns = time.thread_time_ns()
+        if request.parallel_process:
+            # Concurrent on one event loop: shows scheduling cost, not multi-core speedup
+            async def process(req):
+                return echo_response(req)
+            responses = await asyncio.gather(*(process(req) for req in request.requests))
+        else:
+            responses = [echo_response(req) for req in request.requests]
+        return performance_test_pb2.BatchResponse(
+            responses=responses,
+            batch_metrics=collect_metrics(start_ns, cpu_start_ns)
+        )
+
+class ThreadedPerformanceTestServicer(performance_test_pb2_grpc.PerformanceTestServicer):
+    """Blocking handlers, run by grpc.aio on its migration thread pool"""
+
+    def __init__(self, max_workers):
+        # Separate from the server pool so parallel batches can't starve it
+        self.batch_executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def UnaryCall(self, request, context):
+        return echo_response(request)
+
+    def ServerStreaming(self, request, context):
+        for i in range(request.message_count):
+            yield stream_response(i, request.payload_size)
+            if request.interval_ms > 0:
+                time.sleep(request.interval_ms / 1000)
+
+    def ClientStreaming(self, request_iterator, context):
+        start_ns = time.perf_counter_ns()
+        cpu_start_ns = time.thread_time_ns()
+        count = 0
+        for _ in request_iterator:
+            count += 1
+        return performance_test_pb2.StreamResponse(
+            messages_processed=count,
+            aggregate_metrics=collect_metrics(start_ns, cpu_start_ns)
+        )
+
+    def BidirectionalStreaming(self, request_iterator, context):
+        for request in request_iterator:
+            yield echo_response(request)
+
+    def PingPong(self, request, context):
+        return pong_response(request)
+
+    def BatchProcess(self, request, context):
+        start_ns = time.perf_counter_ns()
+        cpu_start_ns = time.thread_time_ns()
+        if request.parallel_process:
+            responses = list(self.batch_executor.map(echo_response, request.requests))
+        else:
+            responses = [echo_response(req) for req in request.requests]
+        return performance_test_pb2.BatchResponse(
+            responses=responses,
+            batch_metrics=collect_metrics(start_ns, cpu_start_ns)
+        )
+
+EXECUTOR_MODELS = ('async', 'threads')
+
+def create_server(address='0.0.0.0:50051', executor='async', max_workers=10, compression=None):
+    """Build (but do not start) a grpc.aio server for the PerformanceTest service.
+
+    compression ('gzip' or 'deflate') compresses every response; compressed
+    requests are accepted either way.
+    """
+    if executor not in EXECUTOR_MODELS:
+        raise ValueError(f"Unknown executor model: {executor}")
+    options = [
+        ('grpc.max_send_message_length', MAX_MESSAGE_LENGTH),
+        ('grpc.max_receive_message_length', MAX_MESSAGE_LENGTH)
+    ]
+    compression = COMPRESSION_ALGORITHMS[compression] if compression else None
+    if executor == 'async':
+        server = grpc.aio.server(options=options, compression=compression)
+        servicer = AsyncPerformanceTestServicer()
+    else:
+        server = grpc.aio.server(
+            migration_thread_pool=ThreadPoolExecutor(max_workers=max_workers),
+            options=options,
+            compression=compression
+        )
+        servicer = ThreadedPerformanceTestServicer(max_workers)
+    performance_test_pb2_grpc.add_PerformanceTestServicer_to_server(servicer, server)
+    server.add_insecure_port(address)
+    return server
+
+async def serve(address, executor, max_workers, compression=None):
+    server = create_server(address, executor, max_workers, compression)
+    await server.start()
+    print(f"Server listening on {address} ({executor} executor"
+          f"{f', {max_workers} threads' if executor == 'threads' else ''}"
+          f"{f', {compression} responses' if compression else ''})")
+    await server.wait_for_termination()
+
+def main():
+    parser = argparse.ArgumentParser(description="Python grpc.aio PerformanceTest server")
+    parser.add_argument('--address', default='0.0.0.0:50051')
+    parser.add_argument('--executor', choices=EXECUTOR_MODELS, default='async')
+    parser.add_argument('--threads', type=int, default=10)
+    parser.add_argument('--compression', choices=sorted(COMPRESSION_ALGORITHMS),
+                        help="Compress every response with this algorithm")
+    args = parser.parse_args()
+    asyncio.run(serve(args.address, args.executor, args.threads, args.compression))
+
+if __name__ == "__main__":
+    main()
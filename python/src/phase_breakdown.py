@@ -0,0 +1,184 @@
+# phase_breakdown.py
+
+import argparse
+import json
+import time
+import uuid
+import grpc
+import performance_test_pb2
+from google.protobuf.timestamp_pb2 import Timestamp
+from channel_pool import DEFAULT_CHANNEL_OPTIONS
+from grpc_fast_path import UNARY_CALL_METHOD
+from payload_pool import PayloadPool
+from performance_client import PAYLOAD_SIZES
+from rest_performance_client import PayloadSize
+from rest_transport import RestTransport
+from rest_fast_path import JSON_HEADERS
+
+PHASES = ('construct', 'serialize', 'transport', 'server', 'deserialize')
+
+# One character per phase in the stacked bars
+PHASE_MARKS = {'construct': 'c', 'serialize': 's', 'transport': '~', 'server': 'S', 'deserialize': 'd'}
+
+class PhaseTotals:
+    """Per-phase nanosecond totals for a series of calls"""
+
+    def __init__(self):
+        self.calls = 0
+        self.totals = dict.fromkeys(PHASES, 0)
+        self.wall_ns = 0
+
+    def add(self, wall_ns, construct, serialize, server, deserialize):
+        # Transport is what is left of the call: network, HTTP framing and both
+        # sides' RPC/HTTP stacks outside the handler
+        transport = max(wall_ns - construct - serialize - server - deserialize, 0)
+        for phase, value in zip(PHASES, (construct, serialize, transport, server, deserialize)):
+            self.totals[phase] += value
+        self.wall_ns += wall_ns
+        self.calls += 1
+
+    def to_dict(self, protocol, payload_size):
+        result = {
+            'protocol': protocol,
+            'payload_size': payload_size,
+            'calls': self.calls,
+            'total_ms': self.wall_ns / self.calls / 1e6
+        }
+        phase_sum = sum(self.totals.values()) or 1
+        for phase in PHASES:
+            result[f"{phase}_ms"] = self.totals[phase] / self.calls / 1e6
+            result[f"{phase}_percent"] = self.totals[phase] / phase_sum * 100
+        return result
+
+class GrpcPhaseProfiler:
+    """UnaryCall with request_serializer/response_deserializer hooks that time protobuf encode and decode.
+
+    The blocking stub runs both hooks on the calling thread, so the last
+    call's timings can be read straight off the profiler.
+    """
+
+    def __init__(self, server_address='localhost:50051', payload_pool=None):
+        self.channel = grpc.insecure_channel(server_address, options=list(DEFAULT_CHANNEL_OPTIONS.items()))
+        self.payload_pool = payload_pool or PayloadPool(PAYLOAD_SIZES.values())
+        self._call = self.channel.unary_unary(
+            UNARY_CALL_METHOD,
+            request_serializer=self._serialize,
+            response_deserializer=self._deserialize
+        )
+        self._serialize_ns = 0
+        self._deserialize_ns = 0
+
+    def _serialize(self, request):
+        start = time.perf_counter_ns()
+        data = request.SerializeToString()
+        self._serialize_ns = time.perf_counter_ns() - start
+        return data
+
+    def _deserialize(self, raw):
+        start = time.perf_counter_ns()
+        response = performance_test_pb2.TestResponse.FromString(raw)
+        self._deserialize_ns = time.perf_counter_ns() - start
+        return response
+
+    def measure(self, payload_name, iterations=1000, warmup=100):
+        payload_size = performance_test_pb2.PayloadSize.Value(payload_name)
+        payload = self.payload_pool.get_bytes(PAYLOAD_SIZES[payload_size])
+        totals = PhaseTotals()
+        for i in range(warmup + iterations):
+            start = time.perf_counter_ns()
+            timestamp = Timestamp()
+            timestamp.FromNanoseconds(time.time_ns())
+            request = performance_test_pb2.TestRequest(
+                request_id=str(uuid.uuid4()),
+                timestamp=timestamp,
+                payload_size=payload_size,
+                payload=payload
+            )
+            constructed = time.perf_counter_ns()
+            response = self._call(request)
+            finished = time.perf_counter_ns()
+            if i >= warmup:
+                totals.add(finished - start, constructed - start, self._serialize_ns,
+                           response.metrics.processing_time_us * 1000, self._deserialize_ns)
+        return totals.to_dict('grpc', payload_name)
+
+    def close(self):
+        self.channel.close()
+
+class RestPhaseProfiler:
+    """POST /unary with the JSON encode and decode done by hand around a raw-bytes request"""
+
+    def __init__(self, server_address='http://localhost:8080', payload_pool=None):
+        self.transport = RestTransport(server_address, pool_size=1)
+        self.payload_pool = payload_pool or PayloadPool([size.value for size in PayloadSize])
+
+    def measure(self, payload_name, iterations=1000, warmup=100):
+        payload = self.payload_pool.get_text(PayloadSize[payload_name].value)
+        totals = PhaseTotals()
+        for i in range(warmup + iterations):
+            start = time.perf_counter_ns()
+            request = {
+                'request_id': str(uuid.uuid4()),
+                'timestamp': time.time_ns() // 1000,
+                'payload': payload
+            }
+            constructed = time.perf_counter_ns()
+            body = json.dumps(request).encode()
+            serialized = time.perf_counter_ns()
+            raw = self.transport.post('/unary', data=body, headers=JSON_HEADERS).content
+            received = time.perf_counter_ns()
+            data = json.loads(raw)
+            finished = time.perf_counter_ns()
+            if i >= warmup:
+                totals.add(finished - start, constructed - start, serialized - constructed,
+                           data['metrics']['processing_time_us'] * 1000, finished - received)
+        return totals.to_dict('rest', payload_name)
+
+    def close(self):
+        self.transport.close()
+
+def print_phase_breakdown(results, width=50):
+    """Per payload size, one stacked bar per protocol, scaled to the slowest call of that size"""
+    legend = '  '.join(f"{mark}={phase}" for phase, mark in PHASE_MARKS.items())
+    print(f"\nPer-call phase breakdown ({legend})")
+    for payload_name in dict.fromkeys(r['payload_size'] for r in results):
+        group = [r for r in results if r['payload_size'] == payload_name]
+        scale = width / max(r['total_ms'] for r in group)
+        print(f"\n{payload_name}")
+        for r in group:
+            bar = ''.join(PHASE_MARKS[phase] * round(r[f"{phase}_ms"] * scale) for phase in PHASES)
+            print(f"  {r['protocol']:<5} {r['total_ms']:>8.3f} ms |{bar:<{width}}|")
+        print(f"  {'':<5} {'':>11}  " + ' '.join(f"{phase:>17}" for phase in PHASES))
+        for r in group:
+            cells = ' '.join(f"{r[f'{phase}_ms']:>9.3f} ({r[f'{phase}_percent']:>4.1f}%)" for phase in PHASES)
+            print(f"  {r['protocol']:<5} {'ms (%)':>11}  {cells}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-phase latency breakdown for gRPC and REST unary calls")
+    parser.add_argument('--protocol', nargs='+', choices=['grpc', 'rest'], default=['grpc', 'rest'])
+    parser.add_argument('--payload-size', nargs='+', choices=['SMALL', 'MEDIUM', 'LARGE'],
+                        default=['SMALL', 'MEDIUM', 'LARGE'])
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--grpc-target', default='localhost:50051')
+    parser.add_argument('--rest-target', default='http://localhost:8080')
+    args = parser.parse_args()
+
+    profilers = {}
+    if 'grpc' in args.protocol:
+        profilers['grpc'] = GrpcPhaseProfiler(args.grpc_target)
+    if 'rest' in args.protocol:
+        profilers['rest'] = RestPhaseProfiler(args.rest_target)
+
+    results = []
+    for payload_name in args.payload_size:
+        for protocol, profiler in profilers.items():
+            print(f"Profiling {protocol} unary, payload size: {payload_name}...")
+            results.append(profiler.measure(payload_name, args.iterations, args.warmup))
+    for profiler in profilers.values():
+        profiler.close()
+
+    print_phase_breakdown(results)
+
+if __name__ == "__main__":
+    main()
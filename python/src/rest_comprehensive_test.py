@@ -3,13 +3,13 @@
 import requests
 import time
 import uuid
-import json
-import sseclient
-from urllib.parse import urljoin
+from rest_transport import RestTransport, print_connection_stats
+from sse_parser import iter_events
 
 class RestComprehensiveTester:
-    def __init__(self, server_url='http://localhost:8080'):
+    def __init__(self, server_url='http://localhost:8080', pool_size=10, keep_alive=True):
         self.server_url = server_url
+        self.transport = RestTransport(server_url, pool_size, keep_alive)
 
     def test_unary_call(self):
         print("\n=== Testing Unary Call ===")
@@ -19,7 +19,7 @@ class RestComprehensiveTester:
         }
         
         print("Sending unary request...")
-        response = requests.post(urljoin(self.server_url, '/unary'), json=request_data)
+        response = self.transport.post('/unary', json=request_data)
         response_data = response.json()
         print(f"Received response with ID: {response_data['request_id']}")
 
@@ -31,17 +31,16 @@ class RestComprehensiveTester:
         }
         
         print("Starting server stream...")
-        response = requests.get(
-            urljoin(self.server_url, '/stream'), 
+        response = self.transport.get(
+            '/stream', 
             params=params, 
             stream=True,
             headers={'Accept': 'text/event-stream'}
         )
         
-        client = sseclient.SSEClient(response)
         try:
-            for i, event in enumerate(client.events(), 1):
-                data = json.loads(event.data)
+            for i, event in enumerate(iter_events(response), 1):
+                data = event.json()
                 print(f"Received stream response {i}")
         except Exception as e:
             print(f"Error processing stream: {e}")
@@ -61,7 +60,7 @@ class RestComprehensiveTester:
             time.sleep(0.5)
         
         # Send all messages in one batch
-        response = requests.post(urljoin(self.server_url, '/client-stream'), json={'messages': messages})
+        response = self.transport.post('/client-stream', json={'messages': messages})
         response_data = response.json()
         print(f"Client streaming complete. Processed {response_data['messages_processed']} messages")
 
@@ -73,7 +72,7 @@ class RestComprehensiveTester:
                 'payload': f'Bidirectional message {i}'
             }
             print(f"Sending bidirectional message {i}")
-            response = requests.post(urljoin(self.server_url, '/bidirectional'), json=message)
+            response = self.transport.post('/bidirectional', json=message)
             response_data = response.json()
             print(f"Received bidirectional response {i}")
             time.sleep(0.5)
@@ -86,7 +85,7 @@ class RestComprehensiveTester:
         }
         
         print("Sending ping...")
-        response = requests.post(urljoin(self.server_url, '/ping'), json=request_data)
+        response = self.transport.post('/ping', json=request_data)
         response_data = response.json()
         print(f"Received pong from client: {response_data['client_id']}")
 
@@ -107,14 +106,14 @@ class RestComprehensiveTester:
             'requests': requests_data,
             'parallel_process': False
         }
-        response = requests.post(urljoin(self.server_url, '/batch'), json=batch_request)
+        response = self.transport.post('/batch', json=batch_request)
         response_data = response.json()
         print(f"Processed {len(response_data['responses'])} requests sequentially")
         
         # Test parallel processing
         print("\nTesting parallel batch processing...")
         batch_request['parallel_process'] = True
-        response = requests.post(urljoin(self.server_url, '/batch'), json=batch_request)
+        response = self.transport.post('/batch', json=batch_request)
         response_data = response.json()
         print(f"Processed {len(response_data['responses'])} requests in parallel")
 
@@ -138,6 +137,9 @@ class RestComprehensiveTester:
             
             self.test_batch_processing()
             
+            print()
+            print_connection_stats(self.transport.connection_stats())
+            
         except requests.exceptions.RequestException as e:
             print(f"HTTP error occurred: {e}")
         except Exception as e:
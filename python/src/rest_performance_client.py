@@ -1,24 +1,38 @@
 # rest_performance_client.py
 
-import requests
 import time
 import uuid
-import statistics
 import json
 from enum import Enum
+from open_loop import OpenLoopScheduler, print_open_loop_results
+from latency_histogram import LatencyHistogram
+from payload_pool import PayloadPool
+from rest_transport import RestTransport, print_connection_stats
+from rest_fast_path import RestRequestTemplate, JSON_HEADERS, parse_response
+from streaming_analysis import StreamArrivalRecorder, print_stream_analysis
+from sse_parser import iter_events
+from clock_sync import ClockSyncEstimator, print_clock_sync, paced_pings, SYNC_SECONDS, SYNC_PINGS_PER_SECOND
+from client_metrics import rest_metrics_hook
 
 class PayloadSize(Enum):
     SMALL = 1024      # 1KB
     MEDIUM = 10240    # 10KB
     LARGE = 102400    # 100KB
+    XLARGE = 1048576  # 1MB
 
 class RestPerformanceClient:
-    def __init__(self, server_address='http://localhost:8080'):
+    def __init__(self, server_address='http://localhost:8080', payload_pool=None,
+                 pool_size=10, keep_alive=True, metrics=None):
         self.server_address = server_address
+        self.payload_pool = payload_pool or PayloadPool([size.value for size in PayloadSize])
+        self.transport = RestTransport(server_address, pool_size, keep_alive)
+        if metrics is not None:
+            self.transport.add_hook(rest_metrics_hook(metrics))
 
     def measure_latency(self, iterations=1000):
         """Measure basic latency using ping-pong"""
-        latencies = []
+        histogram = LatencyHistogram()
+        stats_before = self.transport.connection_stats()
         
         for _ in range(iterations):
             start_time = time.perf_counter_ns()
@@ -28,45 +42,94 @@ class RestPerformanceClient:
                 'timestamp': int(time.time() * 1_000_000)
             }
             
-            response = requests.post(f"{self.server_address}/ping", json=request_data)
+            response = self.transport.post("/ping", json=request_data)
             
             end_time = time.perf_counter_ns()
-            latency = (end_time - start_time) / 1_000_000  # Convert to milliseconds
-            latencies.append(latency)
+            histogram.record((end_time - start_time) // 1000)  # Convert to microseconds
         
-        results = {
-            'min_latency': min(latencies),
-            'max_latency': max(latencies),
-            'avg_latency': statistics.mean(latencies),
-            'p95_latency': statistics.quantiles(latencies, n=20)[18],
-            'p99_latency': statistics.quantiles(latencies, n=100)[98]
-        }
+        results = histogram.to_latency_dict()
+        connection_stats = self.transport.connection_stats(since=stats_before)
 
         print("\nLatency Results:")
         for metric, value in results.items():
             print(f"{metric}: {value:.2f} ms")
+        print_connection_stats(connection_stats)
+        
+        results.update(connection_stats)
+        return results
+
+    def measure_latency_open_loop(self, rate, duration=10, max_workers=64):
+        """Send pings at a constant arrival rate and report corrected and uncorrected latency"""
+        def send():
+            request_data = {
+                'client_id': str(uuid.uuid4()),
+                'send_timestamp': int(time.time() * 1_000_000)
+            }
+            transport.post("/ping", json=request_data)
+
+        # Enough pooled connections that every worker thread keeps its own
+        transport = RestTransport(self.server_address, pool_size=max_workers,
+                                  keep_alive=self.transport.keep_alive)
+        scheduler = OpenLoopScheduler(rate, duration, max_workers)
+        results = scheduler.run(send)
+        results.update(transport.connection_stats())
+        transport.close()
+
+        print("\nOpen-loop latency results:")
+        print_open_loop_results(results)
+        print_connection_stats(results)
+
+        return results
+
+    def measure_clock_sync(self, duration_seconds=SYNC_SECONDS, rate=SYNC_PINGS_PER_SECOND, window_size=100):
+        """/ping paced over duration_seconds, with NTP-style clock offset/drift and forward/return latency"""
+        estimator = ClockSyncEstimator(window_size)
+        for _ in paced_pings(duration_seconds, rate):
+            body = json.dumps({
+                'client_id': str(uuid.uuid4()),
+                'send_timestamp': time.time_ns() // 1000
+            }).encode()
+            # t0 and t3 bracket only the call: the body is encoded before and the response parsed after
+            sent_ns = time.time_ns()
+            response = self.transport.post("/ping", data=body, headers=JSON_HEADERS)
+            received_ns = time.time_ns()
+            estimator.add(sent_ns / 1000, response.json()['server_timestamp'], received_ns / 1000)
         
+        results = estimator.analyze()
+        print_clock_sync(results)
         return results
 
-    def measure_throughput(self, payload_size: PayloadSize, duration=10):
+    def measure_throughput(self, payload_size: PayloadSize, duration=10, pipeline_depth=1):
         """Measure throughput with different payload sizes"""
         messages_sent = 0
         bytes_sent = 0
+        stats_before = self.transport.connection_stats()
         start_time = time.time()
         
         size_name = payload_size.name
         size_bytes = payload_size.value
-        payload = 'x' * size_bytes
+        payload = self.payload_pool.get_text(size_bytes)
         
         print(f"\nPayload size: {size_name}")
         
         while time.time() - start_time < duration:
+            if pipeline_depth > 1:
+                # HTTP/1.1 pipelining: write pipeline_depth requests before reading any response
+                bodies = [
+                    json.dumps({'request_id': str(messages_sent + i), 'payload': payload}).encode()
+                    for i in range(pipeline_depth)
+                ]
+                self.transport.pipeline("/unary", bodies)
+                messages_sent += pipeline_depth
+                bytes_sent += len(payload) * pipeline_depth
+                continue
+
             request_data = {
                 'request_id': str(messages_sent),
                 'payload': payload
             }
             
-            response = requests.post(f"{self.server_address}/unary", json=request_data)
+            response = self.transport.post("/unary", json=request_data)
             messages_sent += 1
             bytes_sent += len(payload)
         
@@ -78,23 +141,88 @@ class RestPerformanceClient:
         print(f"Throughput: {throughput_mb:.2f} MB/s")
         print(f"Total messages: {messages_sent}")
         print(f"Total data: {bytes_sent / (1024 * 1024):.2f} MB")
+        connection_stats = self.transport.connection_stats(since=stats_before)
+        print_connection_stats(connection_stats)
         
-        return {
+        results = {
             'messages_per_second': messages_per_second,
             'throughput_mb_s': throughput_mb,
             'total_messages': messages_sent,
             'total_bytes': bytes_sent
         }
+        results.update(connection_stats)
+        return results
+
+    def measure_throughput_fast(self, payload_size: PayloadSize, duration=10, parse='none'):
+        """Measure throughput posting a pre-encoded JSON body with only the request id patched"""
+        template = RestRequestTemplate(self.payload_pool.get_text(payload_size.value))
+        messages_sent = 0
+        start_time = time.time()
+        
+        while time.time() - start_time < duration:
+            response = self.transport.post("/unary", data=template.render(), headers=JSON_HEADERS)
+            parse_response(response.content, parse)
+            messages_sent += 1
+        
+        elapsed_time = time.time() - start_time
+        messages_per_second = messages_sent / elapsed_time
+        throughput_mb = (messages_sent * payload_size.value / elapsed_time) / (1024 * 1024)
+        
+        print(f"Fast path ({parse} parse) messages per second: {messages_per_second:.2f}")
+        print(f"Fast path throughput: {throughput_mb:.2f} MB/s")
+        
+        return {
+            'messages_per_second': messages_per_second,
+            'throughput_mb_s': throughput_mb,
+            'total_messages': messages_sent,
+            'total_bytes': messages_sent * payload_size.value
+        }
+
+    def measure_json_overhead(self, payload_size: PayloadSize, iterations=1000):
+        """Time JSON encode/decode on their own, without any HTTP round trip"""
+        payload = self.payload_pool.get_text(payload_size.value)
+        template = RestRequestTemplate(payload)
+        # Decode cost is measured on a real response body from the server
+        response_body = self.transport.post("/unary", data=template.render(), headers=JSON_HEADERS).content
+        
+        start = time.perf_counter_ns()
+        for i in range(iterations):
+            json.dumps({'request_id': str(i), 'payload': payload}).encode()
+        encode_ns = time.perf_counter_ns() - start
+        
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            template.render()
+        template_ns = time.perf_counter_ns() - start
+        
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            json.loads(response_body)
+        decode_ns = time.perf_counter_ns() - start
+        
+        results = {
+            'encode_us': encode_ns / iterations / 1000,
+            'template_render_us': template_ns / iterations / 1000,
+            'decode_us': decode_ns / iterations / 1000
+        }
+        
+        print(f"JSON encode per request: {results['encode_us']:.2f} µs")
+        print(f"Template render per request: {results['template_render_us']:.2f} µs")
+        print(f"JSON decode per response: {results['decode_us']:.2f} µs")
+        
+        return results
 
     def test_streaming(self, message_count=1000, interval_ms=100):
         """Test server streaming performance"""
         print("\nTesting server streaming...")
         print(f"Testing server streaming with {message_count} messages...")
         
+        recorder = StreamArrivalRecorder(interval_ms)
         start_time = time.time()
+        recorder.start()
         
-        response = requests.get(
-            f"{self.server_address}/stream",
+        response = self.transport.get(
+            "/stream",
             params={
                 'message_count': message_count,
                 'interval_ms': interval_ms
@@ -103,9 +231,9 @@ class RestPerformanceClient:
         )
         
         messages_received = 0
-        for line in response.iter_lines():
-            if line:
-                messages_received += 1
+        for event in iter_events(response):
+            recorder.record(int(event.field('sequence_number')))
+            messages_received += 1
         
         elapsed_time = time.time() - start_time
         throughput = messages_received / elapsed_time
@@ -113,17 +241,23 @@ class RestPerformanceClient:
         print(f"Received {messages_received} messages in {elapsed_time:.2f} seconds")
         print(f"Average throughput: {throughput:.2f} messages/second")
         
-        return {
+        analysis = recorder.analyze()
+        print_stream_analysis(analysis)
+        
+        results = {
             'messages_received': messages_received,
             'elapsed_time': elapsed_time,
             'throughput': throughput
         }
+        results.update(analysis)
+        return results
 
     def test_batch_processing(self, batch_sizes=[10, 50, 100], parallel_options=[False, True]):
         """Test batch processing performance"""
         print("\nTesting batch processing...")
         
         results = {}
+        stats_before = self.transport.connection_stats()
         
         for parallel in parallel_options:
             mode = "Parallel" if parallel else "Sequential"
@@ -139,8 +273,8 @@ class RestPerformanceClient:
                 
                 start_time = time.time()
                 
-                response = requests.post(
-                    f"{self.server_address}/batch",
+                response = self.transport.post(
+                    "/batch",
                     json={
                         'requests': requests_data,
                         'parallel_process': parallel
@@ -161,6 +295,8 @@ class RestPerformanceClient:
                     'avg_time_ms': avg_time
                 }
         
+        print()
+        print_connection_stats(self.transport.connection_stats(since=stats_before))
         return results
 
 def main():
@@ -169,9 +305,18 @@ def main():
     print("Testing latency...")
     client.measure_latency()
     
+    print("\nTesting open-loop latency...")
+    for rate in [2000, 5000, 10000]:
+        client.measure_latency_open_loop(rate)
+    
+    print("\nTesting clock offset and one-way latency...")
+    client.measure_clock_sync()
+    
     print("\nTesting throughput with different payload sizes...")
-    for size in PayloadSize:
+    for size in [PayloadSize.SMALL, PayloadSize.MEDIUM, PayloadSize.LARGE]:
         client.measure_throughput(size)
+        client.measure_throughput_fast(size)
+        client.measure_json_overhead(size)
     
     print("\nTesting streaming performance...")
     client.test_streaming()
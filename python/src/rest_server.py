@@ -0,0 +1,292 @@
+# rest_server.py
+
+import argparse
+import asyncio
+import gzip
+import json
+import multiprocessing
+import socket
+import time
+import zlib
+from urllib.parse import urlsplit, parse_qs
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    415: 'Unsupported Media Type',
+    500: 'Internal Server Error'
+}
+
+def _now_us():
+    return time.time_ns() // 1000
+
+class HttpRequest:
+    def __init__(self, method, target, version, headers, body):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        self.body = body
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+async def read_request(reader):
+    """Read one HTTP/1.1 request; returns None when the client closed the connection"""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, target, version = request_line.decode('latin-1').split()
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b';', 1)[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+        body = bytes(body)
+    else:
+        body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+    return HttpRequest(method, target, version, headers, body)
+
+# Content-Encoding values accepted on request bodies and offered on responses
+CONTENT_CODINGS = {
+    'gzip': (gzip.compress, gzip.decompress),
+    'deflate': (zlib.compress, zlib.decompress)
+}
+
+def decode_body(body, content_encoding):
+    """Undo a request's Content-Encoding; KeyError for a coding the server does not speak"""
+    content_encoding = content_encoding.strip().lower()
+    if content_encoding in ('', 'identity'):
+        return body
+    return CONTENT_CODINGS[content_encoding][1](body)
+
+def accepted_coding(accept_encoding):
+    """First coding in an Accept-Encoding header that the server can produce, or None"""
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().lower().partition(';')
+        if coding in CONTENT_CODINGS and params.replace(' ', '') not in ('q=0', 'q=0.0'):
+            return coding
+    return None
+
+def build_response(status, body, content_type='application/json', keep_alive=True, content_encoding=None):
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            + (f"Content-Encoding: {content_encoding}\r\n" if content_encoding else '')
+            + f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+class RestServer:
+    """Standard-library asyncio mirror of src/rest_server.cpp.
+
+    Same routes and JSON schema as the C++ RestServer, with HTTP/1.1
+    keep-alive, in-order handling of pipelined requests, and /stream sent as
+    real chunked server-sent events rather than one buffered body.
+
+    gzip or deflate request bodies are always accepted. Responses are only
+    compressed with compress_responses, for clients whose Accept-Encoding
+    allows it and bodies of at least compress_min_bytes; HTTP clients send
+    Accept-Encoding by default, so this stays opt-in to keep plain runs plain.
+    """
+
+    def __init__(self, compress_responses=False, compression_level=6, compress_min_bytes=256):
+        self.compress_responses = compress_responses
+        self.compression_level = compression_level
+        self.compress_min_bytes = compress_min_bytes
+        self.routes = {
+            ('POST', '/unary'): self.unary,
+            ('POST', '/client-stream'): self.client_stream,
+            ('POST', '/bidirectional'): self.bidirectional,
+            ('POST', '/ping'): self.ping,
+            ('POST', '/batch'): self.batch
+        }
+
+    def unary(self, request):
+        received_at = _now_us()
+        start = time.perf_counter_ns()
+        data = json.loads(request.body)
+        response = {
+            'request_id': data['request_id'],
+            'received_at': received_at,
+            'processed_at': _now_us(),
+            'metrics': {'processing_time_us': (time.perf_counter_ns() - start) // 1000}
+        }
+        return response
+
+    def client_stream(self, request):
+        data = json.loads(request.body)
+        return {'messages_processed': len(data['messages'])}
+
+    def bidirectional(self, request):
+        return json.loads(request.body)
+
+    def ping(self, request):
+        data = json.loads(request.body)
+        return {
+            'client_id': data.get('client_id'),
+            'client_timestamp': data.get('send_timestamp'),
+            'server_timestamp': _now_us()
+        }
+
+    def batch(self, request):
+        start = time.perf_counter_ns()
+        data = json.loads(request.body)
+        # Handlers are CPU-only, so parallel_process has nothing to overlap in one process
+        responses = [{'request_id': r['request_id']} for r in data['requests']]
+        return {
+            'responses': responses,
+            'batch_metrics': {'processing_time_us': (time.perf_counter_ns() - start) // 1000}
+        }
+
+    async def stream(self, request, writer):
+        """Server-sent events, one chunk per message, with interval_ms between them"""
+        try:
+            message_count = int(request.params['message_count'])
+            interval_ms = int(request.params['interval_ms'])
+            if message_count < 0 or interval_ms < 0:
+                raise ValueError("message_count and interval_ms must not be negative")
+        except KeyError as e:
+            writer.write(build_response(400, f"Missing query parameter {e}".encode(), 'text/plain',
+                                        request.keep_alive))
+            await writer.drain()
+            return
+        except ValueError as e:
+            writer.write(build_response(400, str(e).encode(), 'text/plain', request.keep_alive))
+            await writer.drain()
+            return
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\n"
+                     b"Transfer-Encoding: chunked\r\n"
+                     + (b"Connection: keep-alive\r\n\r\n" if request.keep_alive else b"Connection: close\r\n\r\n"))
+        for i in range(1, message_count + 1):
+            event = b'data: ' + json.dumps({'sequence_number': i, 'request_id': str(i)}).encode() + b'\n\n'
+            writer.write(b'%x\r\n%s\r\n' % (len(event), event))
+            await writer.drain()
+            if interval_ms > 0 and i < message_count:
+                await asyncio.sleep(interval_ms / 1000)
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+
+                if request.method == 'GET' and request.path == '/stream':
+                    await self.stream(request, writer)
+                else:
+                    writer.write(self.dispatch(request))
+                    await writer.drain()
+
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def dispatch(self, request):
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            status = 405 if any(path == request.path for _, path in self.routes) else 404
+            return build_response(status, b'', 'text/plain', request.keep_alive)
+        try:
+            request.body = decode_body(request.body, request.headers.get('content-encoding', ''))
+        except KeyError:
+            return build_response(415, b'Unsupported Content-Encoding', 'text/plain', request.keep_alive)
+        except (OSError, EOFError, zlib.error) as e:
+            return build_response(400, str(e).encode(), 'text/plain', request.keep_alive)
+        try:
+            body = json.dumps(handler(request)).encode()
+        except (ValueError, KeyError, TypeError) as e:
+            return build_response(400, str(e).encode(), 'text/plain', request.keep_alive)
+
+        coding = None
+        if self.compress_responses and len(body) >= self.compress_min_bytes:
+            coding = accepted_coding(request.headers.get('accept-encoding', ''))
+            if coding is not None:
+                body = CONTENT_CODINGS[coding][0](body, self.compression_level)
+        return build_response(200, body, keep_alive=request.keep_alive, content_encoding=coding)
+
+    async def serve(self, sock):
+        server = await asyncio.start_server(self.handle_connection, sock=sock)
+        async with server:
+            await server.serve_forever()
+
+def create_listening_socket(host='0.0.0.0', port=8080, backlog=1024):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+def _run_worker(sock, server_options):
+    try:
+        asyncio.run(RestServer(**server_options).serve(sock))
+    except KeyboardInterrupt:
+        pass
+
+def start_workers(host='0.0.0.0', port=8080, workers=1, **server_options):
+    """Fork worker processes that all accept from one shared listening socket"""
+    sock = create_listening_socket(host, port)
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_run_worker, args=(sock, server_options), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    sock.close()
+    return processes
+
+def main():
+    parser = argparse.ArgumentParser(description="Python asyncio REST server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--compress-responses', action='store_true',
+                        help="gzip/deflate response bodies for clients that send Accept-Encoding")
+    parser.add_argument('--compression-level', type=int, default=6)
+    parser.add_argument('--compress-min-bytes', type=int, default=256)
+    args = parser.parse_args()
+
+    processes = start_workers(args.host, args.port, args.workers,
+                              compress_responses=args.compress_responses,
+                              compression_level=args.compression_level,
+                              compress_min_bytes=args.compress_min_bytes)
+    print(f"REST Server starting on port {args.port} with {args.workers} worker(s)"
+          f"{', compressing responses' if args.compress_responses else ''}...")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# rest_transport.py
+
+import socket
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import stream_decode_response_unicode
+from urllib.parse import urlsplit
+
+# What ends a server-sent event; streamed text/event-stream responses count one message per separator
+SSE_SEPARATORS = (b'\n\n', b'\r\n\r\n')
+
+class RestTransport:
+    """Persistent keep-alive HTTP transport shared by the REST clients.
+
+    Requests go through one requests.Session backed by a fixed-size urllib3
+    connection pool, so connections are reused the way gRPC reuses its
+    channel. Connection counters come straight from the urllib3 pools, which
+    lets every result show how many connections were opened versus reused.
+    Optional HTTP/1.1 pipelining writes several requests on one raw socket
+    before reading any of the responses. Hooks added with add_hook() see every
+    completed request as (method, path, status, latency_ns, bytes_out, bytes_in,
+    messages_in). A stream=True response is reported once its body has been
+    read to the end (or closed): latency runs to end of stream, and an SSE body
+    counts one message per event.
+    """
+
+    def __init__(self, server_address='http://localhost:8080', pool_size=10, keep_alive=True):
+        self.server_address = server_address.rstrip('/')
+        self.keep_alive = keep_alive
+        self.session = requests.Session()
+        # Pooled connections already get TCP_NODELAY from urllib3's default_socket_options
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+        self._pipeline_socket = None
+        self._pipeline_reader = None
+        self.pipelined_connections = 0
+        self.pipelined_requests = 0
+        self.hooks = []
+
+    def url(self, path):
+        return f"{self.server_address}{path}"
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def _request(self, method, path, **kwargs):
+        if not self.hooks:
+            return self.session.request(method, self.url(path), **kwargs)
+
+        start = time.perf_counter_ns()
+        try:
+            response = self.session.request(method, self.url(path), **kwargs)
+        except requests.RequestException:
+            for hook in self.hooks:
+                hook(method, path, 'error', time.perf_counter_ns() - start, 0, 0, 0)
+            raise
+        if kwargs.get('stream'):
+            self._record_streamed(response, method, path, start)
+            return response
+        bytes_in = len(response.content)
+        latency_ns = time.perf_counter_ns() - start
+        bytes_out = len(response.request.body or b'')
+        for hook in self.hooks:
+            hook(method, path, response.status_code, latency_ns, bytes_out, bytes_in, 1)
+        return response
+
+    def _record_streamed(self, response, method, path, start):
+        """Wrap response.iter_content (which iter_lines and .content use too) to report the body once read"""
+        iter_content = response.iter_content
+        event_stream = response.headers.get('Content-Type', '').startswith('text/event-stream')
+        bytes_out = len(response.request.body or b'')
+        hooks = list(self.hooks)
+        recorded = []
+
+        def counted(chunk_size):
+            received = events = 0
+            tail = b''
+            try:
+                for chunk in iter_content(chunk_size):
+                    received += len(chunk)
+                    if event_stream:
+                        # Separators inside the chunk, plus any split across the previous chunk's end
+                        head = chunk[:3]
+                        for separator in SSE_SEPARATORS:
+                            events += chunk.count(separator) + (tail + head).count(separator) \
+                                - tail.count(separator) - head.count(separator)
+                        tail = chunk[-3:]
+                    yield chunk
+            finally:
+                if not recorded:
+                    recorded.append(True)
+                    latency_ns = time.perf_counter_ns() - start
+                    for hook in hooks:
+                        hook(method, path, response.status_code, latency_ns, bytes_out, received,
+                             events if event_stream else 1)
+
+        def hooked_iter_content(chunk_size=1, decode_unicode=False):
+            chunks = counted(chunk_size)
+            return stream_decode_response_unicode(chunks, response) if decode_unicode else chunks
+
+        response.iter_content = hooked_iter_content
+
+    def post(self, path, **kwargs):
+        return self._request('POST', path, **kwargs)
+
+    def get(self, path, **kwargs):
+        return self._request('GET', path, **kwargs)
+
+    def connection_stats(self, since=None):
+        """Connections opened and requests sent so far (optionally relative to an earlier snapshot)"""
+        opened = self.pipelined_connections
+        sent = self.pipelined_requests
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        if since is not None:
+            opened -= since['connections_opened']
+            sent -= since['requests_sent']
+        return {
+            'connections_opened': opened,
+            'requests_sent': sent,
+            'connections_reused': max(sent - opened, 0)
+        }
+
+    def _connect_pipeline(self):
+        parts = urlsplit(self.server_address)
+        sock = socket.create_connection((parts.hostname, parts.port or 80))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._pipeline_socket = sock
+        self._pipeline_reader = sock.makefile('rb')
+        self.pipelined_connections += 1
+
+    def _close_pipeline(self):
+        if self._pipeline_socket is not None:
+            self._pipeline_reader.close()
+            self._pipeline_socket.close()
+        self._pipeline_socket = None
+        self._pipeline_reader = None
+
+    def pipeline(self, path, bodies, content_type='application/json'):
+        """POST every body on one connection before reading any response; returns (status, body) pairs"""
+        if self._pipeline_socket is None:
+            self._connect_pipeline()
+
+        host = urlsplit(self.server_address).netloc
+        connection = 'keep-alive' if self.keep_alive else 'close'
+        out = bytearray()
+        for i, body in enumerate(bodies):
+            last = i == len(bodies) - 1
+            out += (f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                    f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: {connection if last else 'keep-alive'}\r\n\r\n").encode('latin-1')
+            out += body
+        start = time.perf_counter_ns()
+        self._pipeline_socket.sendall(out)
+        self.pipelined_requests += len(bodies)
+
+        responses = []
+        close = not self.keep_alive
+        for request_body in bodies:
+            status, headers, body = read_http_response(self._pipeline_reader)
+            responses.append((status, body))
+            for hook in self.hooks:
+                hook('POST', path, status, time.perf_counter_ns() - start, len(request_body), len(body))
+            if headers.get('connection', '').lower() == 'close':
+                close = True
+        if close:
+            self._close_pipeline()
+        return responses
+
+    def close(self):
+        self._close_pipeline()
+        self.session.close()
+
+def read_http_response(reader):
+    """Read one HTTP/1.1 response (Content-Length or chunked) from a buffered binary reader"""
+    status_line = reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed before response")
+    status = int(status_line.split(b' ', 2)[1])
+
+    headers = {}
+    while True:
+        line = reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        body = bytearray()
+        while True:
+            size = int(reader.readline().split(b';', 1)[0], 16)
+            if size == 0:
+                reader.readline()
+                break
+            body += reader.read(size)
+            reader.readline()
+        return status, headers, bytes(body)
+
+    return status, headers, reader.read(int(headers.get('content-length', 0)))
+
+def print_connection_stats(stats):
+    print(f"Connections opened: {stats['connections_opened']}, "
+          f"reused: {stats['connections_reused']} "
+          f"(requests: {stats['requests_sent']})")
@@ -0,0 +1,376 @@
+# results_store.py
+
+import argparse
+import base64
+import bisect
+import itertools
+import json
+import math
+import random
+import sys
+import uuid
+import zlib
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from latency_histogram import LatencyHistogram
+
+# Each record's 100 ms throughput samples are averaged into this many batches.
+# Neighbouring intervals are strongly autocorrelated; batch means of ~1 s are
+# close enough to independent to resample and permute
+THROUGHPUT_BATCHES = 10
+
+# With at least this many runs of a scenario on each side, whole runs are the
+# unit of comparison (a rank test over fewer cannot reach p < 0.05)
+MIN_RUNS = 4
+
+# Up to this many labellings a rank test is enumerated exactly; 4 + 4 runs have C(8, 4) = 70
+EXACT_LABELLINGS = 20000
+
+# Fields that identify "the same scenario" across runs
+SCENARIO_KEYS = ('protocol', 'rpc', 'payload_size', 'payload_content', 'compression', 'request_encoding', 'network', 'concurrency')
+
+def encode_samples(values):
+    samples = array('d', values)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return base64.b64encode(zlib.compress(samples.tobytes(), 9)).decode('ascii')
+
+def decode_samples(text):
+    samples = array('d')
+    samples.frombytes(zlib.decompress(base64.b64decode(text)))
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples
+
+class ResultsStore:
+    """Append-only JSONL file with one record per measured scenario level.
+
+    Each record keeps the summary row plus the raw material for statistics:
+    the encoded latency histogram and the per-interval throughput samples.
+    Records are never rewritten; a run is every record sharing a run_id, and
+    a label (normally the git commit) groups runs into a build.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def append_run(self, rows, samples, environment, label=None, run_id=None):
+        """Append one record per row; samples[i] is the (histogram, timeline) for rows[i]"""
+        run_id = run_id or uuid.uuid4().hex[:12]
+        label = label or (environment.get('git_commit') or '')[:12] or run_id
+        with open(self.path, 'a') as f:
+            for row, (histogram, timeline) in zip(rows, samples):
+                record = {
+                    'run_id': run_id,
+                    'label': label,
+                    'recorded_at': datetime.now(timezone.utc).isoformat(),
+                    'hostname': environment.get('hostname'),
+                    'git_commit': environment.get('git_commit'),
+                    'scenario': {key: row.get(key) for key in SCENARIO_KEYS},
+                    'metrics': row,
+                    'histogram': histogram.encode(),
+                    'throughput_samples': {
+                        'interval_seconds': timeline.interval_seconds,
+                        'rates': encode_samples(timeline.rates())
+                    }
+                }
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        return run_id
+
+    def records(self):
+        with open(self.path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def runs(self):
+        """run_id -> {label, recorded_at, hostname, records} in the order runs were stored"""
+        runs = {}
+        for record in self.records():
+            run = runs.setdefault(record['run_id'], {
+                'label': record['label'],
+                'recorded_at': record['recorded_at'],
+                'hostname': record['hostname'],
+                'records': 0
+            })
+            run['records'] += 1
+        return runs
+
+    def select(self, reference):
+        """Records of a run_id, or of every run carrying that label"""
+        return [r for r in self.records() if reference in (r['run_id'], r['label'])]
+
+def _group_by_scenario(records):
+    """Per scenario, each record's histogram and throughput samples, kept apart by record"""
+    groups = {}
+    for record in records:
+        key = tuple(record['scenario'].get(k) for k in SCENARIO_KEYS)
+        group = groups.setdefault(key, {'histograms': [], 'rates': []})
+        group['histograms'].append(LatencyHistogram.decode(record['histogram']))
+        group['rates'].append(list(decode_samples(record['throughput_samples']['rates'])))
+    return groups
+
+def _merged(histograms):
+    merged = LatencyHistogram()
+    for histogram in histograms:
+        merged.merge(histogram)
+    return merged
+
+def batch_means(values, batches=THROUGHPUT_BATCHES):
+    """Means of `batches` equal consecutive batches; samples left over at the end are dropped"""
+    size = len(values) // batches
+    if size == 0:
+        return [sum(values) / len(values)] if values else []
+    return [sum(values[i * size:(i + 1) * size]) / size for i in range(batches)]
+
+def _midranks(values):
+    """1-based ranks of values, tied values sharing their average rank"""
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    start = 0
+    while start < len(order):
+        stop = start
+        while stop + 1 < len(order) and values[order[stop + 1]] == values[order[start]]:
+            stop += 1
+        for i in range(start, stop + 1):
+            ranks[order[i]] = (start + stop) / 2 + 1
+        start = stop + 1
+    return ranks
+
+def rank_sum_test(a, b):
+    """Two-sided Mann-Whitney (Wilcoxon rank-sum) p-value for a and b.
+
+    Exact when the pooled ranks can be split into groups of len(a) and len(b)
+    in at most EXACT_LABELLINGS ways: every split is enumerated. Otherwise the
+    normal approximation with tie correction.
+    """
+    n_a, n_b = len(a), len(b)
+    n = n_a + n_b
+    ranks = _midranks(list(a) + list(b))
+    expected = n_a * (n + 1) / 2
+    observed = abs(sum(ranks[:n_a]) - expected)
+    if math.comb(n, n_a) <= EXACT_LABELLINGS:
+        extreme = total = 0
+        for labelling in itertools.combinations(ranks, n_a):
+            total += 1
+            if abs(sum(labelling) - expected) >= observed - 1e-9:
+                extreme += 1
+        return extreme / total
+    ties = sum(t * t * t - t for t in Counter(ranks).values())
+    variance = n_a * n_b / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    return math.erfc(observed / math.sqrt(variance) / math.sqrt(2))
+
+def _interval(values, confidence):
+    values = sorted(values)
+    tail = (1 - confidence) / 2
+    lo = values[int(tail * (len(values) - 1))]
+    hi = values[int(math.ceil((1 - tail) * (len(values) - 1)))]
+    return lo, hi
+
+def bootstrap_mean_change(a, b, resamples=2000, confidence=0.95, rng=None):
+    """Relative change in the mean from a to b, with a percentile-bootstrap confidence interval.
+
+    a and b must be roughly independent units (batch means or per-run values),
+    not raw interval samples.
+    """
+    rng = rng or random.Random(0)
+    mean_a, mean_b = sum(a) / len(a), sum(b) / len(b)
+    changes = []
+    for _ in range(resamples):
+        resampled_a = sum(rng.choices(a, k=len(a))) / len(a)
+        resampled_b = sum(rng.choices(b, k=len(b))) / len(b)
+        if resampled_a:
+            changes.append(resampled_b / resampled_a - 1)
+    lo, hi = _interval(changes, confidence)
+    return mean_b / mean_a - 1, lo, hi
+
+class _RankLookup:
+    def __init__(self, histogram):
+        self.values = []
+        self.cumulative = []
+        total = 0
+        for value, c in histogram.recorded_values():
+            total += c
+            self.values.append(value)
+            self.cumulative.append(total)
+        self.count = total
+
+    def value_at(self, rank):
+        return self.values[bisect.bisect_left(self.cumulative, rank)]
+
+    def resampled_percentile(self, percentile, rng):
+        # The q-quantile of a bootstrap resample is the order statistic at a
+        # Binomial(n, q) rank, so it can be drawn without materialising samples
+        q = percentile / 100
+        n = self.count
+        rank = round(rng.gauss(n * q, math.sqrt(n * q * (1 - q))))
+        return self.value_at(min(max(rank, 1), n))
+
+def bootstrap_percentile_change(hist_a, hist_b, percentile=99, resamples=2000, confidence=0.95, rng=None):
+    """Relative change in a latency percentile from hist_a to hist_b, with a bootstrap confidence interval"""
+    rng = rng or random.Random(0)
+    lookup_a, lookup_b = _RankLookup(hist_a), _RankLookup(hist_b)
+    changes = []
+    for _ in range(resamples):
+        value_a = lookup_a.resampled_percentile(percentile, rng)
+        if value_a:
+            changes.append(lookup_b.resampled_percentile(percentile, rng) / value_a - 1)
+    lo, hi = _interval(changes, confidence) if changes else (0.0, 0.0)
+    base = hist_a.percentile(percentile)
+    return (hist_b.percentile(percentile) / base - 1) if base else 0.0, lo, hi
+
+def compare_runs(baseline, candidate, threshold=0.05, alpha=0.05, resamples=2000, confidence=0.95, seed=0):
+    """Compare two sets of records scenario by scenario.
+
+    With MIN_RUNS runs of the scenario on each side (e.g. several benchmark
+    runs stored under one --label), whole runs are the unit: repeated runs of
+    one build can differ by more than any within-run statistic shows.
+    Throughput regresses when its mean falls by more than `threshold` and a
+    rank-sum test on per-run means gives p < alpha; p99 likewise when it rises
+    by more than `threshold` and the test on per-run p99s gives p < alpha.
+
+    With fewer runs the verdict rests on a weaker, within-run basis, marked in
+    the result: the rank-sum test on batch means for throughput
+    (THROUGHPUT_BATCHES per run; the 100 ms interval rates are autocorrelated),
+    and for p99 a bootstrap interval over the latencies that must lie entirely
+    above zero. Neither sees run-to-run variation, so a rerun may not confirm it.
+    """
+    rng = random.Random(seed)
+    baseline_groups = _group_by_scenario(baseline)
+    candidate_groups = _group_by_scenario(candidate)
+    comparisons = []
+    for key in baseline_groups:
+        if key not in candidate_groups:
+            continue
+        group_a, group_b = baseline_groups[key], candidate_groups[key]
+        runs = min(len(group_a['rates']), len(group_b['rates']))
+        comparison = {'scenario': dict(zip(SCENARIO_KEYS, key)), 'runs': runs,
+                      'basis': 'runs' if runs >= MIN_RUNS else 'within-run', 'regressions': []}
+
+        if runs >= MIN_RUNS:
+            basis = 'runs'
+            units_a = [sum(r) / len(r) for r in group_a['rates'] if r]
+            units_b = [sum(r) / len(r) for r in group_b['rates'] if r]
+        else:
+            basis = 'batch means'
+            units_a = [m for r in group_a['rates'] for m in batch_means(r)]
+            units_b = [m for r in group_b['rates'] for m in batch_means(r)]
+        if len(units_a) >= 2 and len(units_b) >= 2 and sum(units_a):
+            change, lo, hi = bootstrap_mean_change(units_a, units_b, resamples, confidence, rng)
+            p = rank_sum_test(units_a, units_b)
+            comparison['throughput'] = {
+                'baseline': sum(units_a) / len(units_a),
+                'candidate': sum(units_b) / len(units_b),
+                'change': change, 'ci_low': lo, 'ci_high': hi, 'p_value': p, 'basis': basis
+            }
+            if change < -threshold and p < alpha:
+                comparison['regressions'].append('throughput')
+
+        hist_a, hist_b = _merged(group_a['histograms']), _merged(group_b['histograms'])
+        if hist_a.total_count and hist_b.total_count:
+            base = hist_a.percentile(99)
+            change = hist_b.percentile(99) / base - 1 if base else 0.0
+            if runs >= MIN_RUNS:
+                basis = 'runs'
+                p99_a = [h.percentile(99) for h in group_a['histograms'] if h.total_count]
+                p99_b = [h.percentile(99) for h in group_b['histograms'] if h.total_count]
+                _, lo, hi = bootstrap_mean_change(p99_a, p99_b, resamples, confidence, rng)
+                p = rank_sum_test(p99_a, p99_b)
+                regressed = change > threshold and p < alpha
+            else:
+                basis = 'latencies'
+                _, lo, hi = bootstrap_percentile_change(hist_a, hist_b, 99, resamples, confidence, rng)
+                p = None
+                regressed = change > threshold and lo > 0
+            comparison['p99'] = {
+                'baseline': base / 1000,
+                'candidate': hist_b.percentile(99) / 1000,
+                'change': change, 'ci_low': lo, 'ci_high': hi, 'p_value': p, 'basis': basis
+            }
+            if regressed:
+                comparison['regressions'].append('p99')
+        comparisons.append(comparison)
+    return comparisons
+
+def print_comparison(comparisons):
+    print(f"{'scenario':<36} {'msgs/s base':>11} {'cand':>10} {'change [95% CI]':>24} {'p':>7}   "
+          f"{'p99 ms base':>11} {'cand':>8} {'change [95% CI]':>24} {'p':>7}  verdict")
+    for c in comparisons:
+        s = c['scenario']
+        name = f"{s['protocol']} {s['rpc']} {s['payload_size']} x{s['concurrency']}"
+        if s.get('compression'):
+            name += f" {s['compression']}"
+        if s.get('request_encoding'):
+            name += f" req-{s['request_encoding']}"
+        if s.get('network'):
+            name += f" @{s['network']}"
+        t = c.get('throughput')
+        l = c.get('p99')
+        throughput = (f"{t['baseline']:>11.1f} {t['candidate']:>10.1f} "
+                      f"{t['change']*100:>+7.1f}% [{t['ci_low']*100:+.1f}, {t['ci_high']*100:+.1f}]"
+                      + (f" {t['p_value']:>7.3f}" if t['p_value'] is not None else f" {'-':>7}")) \
+            if t else f"{'-':>11} {'-':>10} {'-':>24} {'-':>7}"
+        latency = (f"{l['baseline']:>11.3f} {l['candidate']:>8.3f} "
+                   f"{l['change']*100:>+7.1f}% [{l['ci_low']*100:+.1f}, {l['ci_high']*100:+.1f}] "
+                   + (f"{l['p_value']:>7.3f}" if l['p_value'] is not None else f"{'-':>7}")) \
+            if l else f"{'-':>11} {'-':>8} {'-':>24} {'-':>7}"
+        verdict = 'REGRESSION: ' + ', '.join(c['regressions']) if c['regressions'] else 'ok'
+        if c['basis'] != 'runs':
+            verdict += ' *'
+        print(f"{name:<36} {throughput}   {latency}  {verdict}")
+    if any(c['basis'] != 'runs' for c in comparisons):
+        print(f"\n* Fewer than {MIN_RUNS} runs per side: throughput is tested on ~1 s batch means and p99 by "
+              f"its bootstrap interval.\n  Neither sees run-to-run variation, so these verdicts are weaker; "
+              f"store {MIN_RUNS}+ runs per build under one --label to test per-run values.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark results store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help="List the runs in a store")
+    list_parser.add_argument('store')
+
+    compare_parser = subparsers.add_parser('compare', help="Compare two runs or builds")
+    compare_parser.add_argument('store')
+    compare_parser.add_argument('baseline', help="run_id or label")
+    compare_parser.add_argument('candidate', help="run_id or label")
+    compare_parser.add_argument('--threshold', type=float, default=5, help="Regression threshold in percent")
+    compare_parser.add_argument('--alpha', type=float, default=0.05)
+    compare_parser.add_argument('--confidence', type=float, default=0.95)
+    compare_parser.add_argument('--resamples', type=int, default=2000)
+    compare_parser.add_argument('--json', help="Also write the comparison to this JSON file")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store)
+    if args.command == 'list':
+        print(f"{'run_id':<14} {'label':<14} {'records':>7}  {'recorded_at':<32} hostname")
+        for run_id, run in store.runs().items():
+            print(f"{run_id:<14} {run['label']:<14} {run['records']:>7}  {run['recorded_at']:<32} {run['hostname']}")
+        return
+
+    baseline, candidate = store.select(args.baseline), store.select(args.candidate)
+    for reference, records in ((args.baseline, baseline), (args.candidate, candidate)):
+        if not records:
+            sys.exit(f"No records for run or label '{reference}' in {args.store}")
+
+    comparisons = compare_runs(baseline, candidate, args.threshold / 100, args.alpha,
+                               args.resamples, args.confidence)
+    if not comparisons:
+        sys.exit("The two runs have no scenarios in common")
+    print(f"Comparing {args.baseline} ({len(baseline)} records) -> {args.candidate} ({len(candidate)} records), "
+          f"threshold {args.threshold:.1f}%")
+    print_comparison(comparisons)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(comparisons, f, indent=2)
+
+    regressions = sum(1 for c in comparisons if c['regressions'])
+    if regressions:
+        print(f"\n{regressions} scenario(s) regressed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
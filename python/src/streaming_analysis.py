@@ -0,0 +1,95 @@
+# streaming_analysis.py
+
+import time
+from array import array
+from latency_histogram import LatencyHistogram
+
+GAP_PERCENTILES = (50, 90, 99)
+
+class StreamArrivalRecorder:
+    """Timestamps every message of a server stream as it arrives.
+
+    Arrival times use the client's perf counter. When the stream carries a
+    server-side send time (gRPC processed_at) it is kept too, so the server's
+    own pacing can be separated from what the network and client add.
+    """
+
+    def __init__(self, interval_ms):
+        self.interval_ms = interval_ms
+        self.request_start_ns = None
+        self.arrivals_ns = array('q')
+        self.sequence_numbers = array('q')
+        self.server_times_us = array('q')
+
+    def start(self):
+        self.request_start_ns = time.perf_counter_ns()
+
+    def record(self, sequence_number, server_time_us=None):
+        self.arrivals_ns.append(time.perf_counter_ns())
+        self.sequence_numbers.append(sequence_number)
+        if server_time_us is not None:
+            self.server_times_us.append(server_time_us)
+
+    def _out_of_order(self):
+        return sum(1 for a, b in zip(self.sequence_numbers, self.sequence_numbers[1:]) if b != a + 1)
+
+    def analyze(self):
+        count = len(self.arrivals_ns)
+        if not count:
+            return {'messages_received': 0}
+
+        arrivals = self.arrivals_ns
+        interval_us = self.interval_ms * 1000
+        gaps = LatencyHistogram()
+        jitter = LatencyHistogram()
+        for previous, current in zip(arrivals, arrivals[1:]):
+            gap_us = (current - previous) // 1000
+            gaps.record(gap_us)
+            jitter.record(abs(gap_us - interval_us))
+
+        # Where message i arrived relative to where a perfect interval_ms schedule would put it
+        drift_us = [(arrivals[i] - arrivals[0]) // 1000 - i * interval_us for i in range(count)]
+        total_time_ms = (arrivals[-1] - self.request_start_ns) / 1_000_000
+
+        results = {
+            'messages_received': count,
+            'out_of_order': self._out_of_order(),
+            'total_time_ms': total_time_ms,
+            'expected_time_ms': (count - 1) * self.interval_ms,
+            'first_byte_latency_ms': (arrivals[0] - self.request_start_ns) / 1_000_000,
+            'mean_interarrival_ms': gaps.mean() / 1000,
+            'final_drift_ms': drift_us[-1] / 1000,
+            'max_drift_ms': max(drift_us) / 1000,
+            'drift_per_message_ms': drift_us[-1] / 1000 / max(count - 1, 1)
+        }
+        for p, value in zip(GAP_PERCENTILES, gaps.percentiles(GAP_PERCENTILES)):
+            results[f"interarrival_p{p}_ms"] = value / 1000
+        for p, value in zip(GAP_PERCENTILES, jitter.percentiles(GAP_PERCENTILES)):
+            results[f"jitter_p{p}_ms"] = value / 1000
+        results['interarrival_max_ms'] = gaps.max_value / 1000
+
+        if len(self.server_times_us) == count and count > 1:
+            server = self.server_times_us
+            server_span_us = server[-1] - server[0]
+            results['server_drift_ms'] = (server_span_us - (count - 1) * interval_us) / 1000
+            results['server_interval_mean_ms'] = server_span_us / (count - 1) / 1000
+        return results
+
+def print_stream_analysis(results):
+    print(f"Messages received: {results['messages_received']} "
+          f"(out of order: {results.get('out_of_order', 0)})")
+    if not results['messages_received']:
+        return
+    print(f"First-byte latency: {results['first_byte_latency_ms']:.2f} ms")
+    print(f"Total time: {results['total_time_ms']:.2f} ms "
+          f"(schedule: {results['expected_time_ms']:.2f} ms)")
+    print(f"Inter-arrival: mean {results['mean_interarrival_ms']:.3f} ms, "
+          f"p50 {results['interarrival_p50_ms']:.3f} ms, p90 {results['interarrival_p90_ms']:.3f} ms, "
+          f"p99 {results['interarrival_p99_ms']:.3f} ms, max {results['interarrival_max_ms']:.3f} ms")
+    print(f"Jitter vs interval: p50 {results['jitter_p50_ms']:.3f} ms, "
+          f"p90 {results['jitter_p90_ms']:.3f} ms, p99 {results['jitter_p99_ms']:.3f} ms")
+    print(f"Scheduling drift: final {results['final_drift_ms']:.2f} ms, max {results['max_drift_ms']:.2f} ms, "
+          f"{results['drift_per_message_ms']:.3f} ms per message")
+    if 'server_drift_ms' in results:
+        print(f"Server-side drift: {results['server_drift_ms']:.2f} ms "
+              f"(mean server interval {results['server_interval_mean_ms']:.3f} ms)")
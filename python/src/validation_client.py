@@ -1,18 +1,21 @@
-import grpc
 import performance_test_pb2
-import performance_test_pb2_grpc
+from channel_pool import ChannelPool
 from google.protobuf.timestamp_pb2 import Timestamp
 import time
 import statistics
+from latency_histogram import LatencyHistogram
 import numpy as np
 from concurrent import futures
-import psutil
+from wire_accounting import TcpRelay
 import os
 
 class PerformanceValidator:
-    def __init__(self, server_address='localhost:50051'):
-        self.channel = grpc.insecure_channel(server_address)
-        self.stub = performance_test_pb2_grpc.PerformanceTestStub(self.channel)
+    def __init__(self, server_address='localhost:50051', channel_pool_size=1, channel_options=None):
+        self.server_address = server_address
+        self.channel_options = channel_options
+        self.channel_pool = ChannelPool(server_address, channel_pool_size, channel_options)
+        self.channel = self.channel_pool.channels[0]
+        self.stub = self.channel_pool.stub
     
     def _create_timestamp(self):
         now = time.time()
@@ -35,7 +38,7 @@ class PerformanceValidator:
         expected_delays = [1000, 5000, 10000] # change after through testing
         
         for delay in expected_delays:
-            measurements = []
+            histogram = LatencyHistogram()
             for _ in range(iterations):
                 # time taken to send a request and receive a response
                 start = time.perf_counter_ns()
@@ -48,14 +51,15 @@ class PerformanceValidator:
                 response = self.stub.PingPong(request)
                 end = time.perf_counter_ns()
                 
-                actual_delay = (end - start) / 1000  # Converts to microseconds
-                measurements.append(actual_delay)
+                actual_delay = (end - start) // 1000  # Converts to microseconds
+                histogram.record(actual_delay)
             
             results.append({
                 'expected_delay': delay,
-                'mean_measured': statistics.mean(measurements),
-                'stddev': statistics.stdev(measurements),
-                'error_percentage': abs(statistics.mean(measurements) - delay) / delay * 100
+                'mean_measured': histogram.mean(),
+                'stddev': histogram.stdev(),
+                'p99_measured': histogram.percentile(99),
+                'error_percentage': abs(histogram.mean() - delay) / delay * 100
             })
             
         return results
@@ -63,30 +67,40 @@ class PerformanceValidator:
     def measure_throughput_accuracy(self, message_size=1024, duration=5):  # Reduced duration for testing
         messages_sent = 0
         bytes_sent = 0
-        start_time = time.perf_counter()
-        
-        # Network interface baseline
-        net_io_start = psutil.net_io_counters()
-        
-        while time.perf_counter() - start_time < duration:
-            request = performance_test_pb2.TestRequest(
-                request_id=str(messages_sent),
-                timestamp=self._create_timestamp(),
-                payload=b'x' * message_size
-            )
-            response = self.stub.UnaryCall(request)
-            messages_sent += 1
-            bytes_sent += message_size
-            
-        net_io_end = psutil.net_io_counters()
-        
-        actual_bytes = net_io_end.bytes_sent - net_io_start.bytes_sent
+
+        # Count only this benchmark's connection: route it through a counting relay
+        # instead of diffing host-wide interface counters
+        with TcpRelay.for_target(self.server_address) as relay:
+            channel_pool = ChannelPool(relay.address, 1, self.channel_options)
+            stub = channel_pool.stub
+            stub.PingPong(performance_test_pb2.PingRequest(send_timestamp=self._create_timestamp()))
+            relay.reset()
+
+            start_time = time.perf_counter()
+            while time.perf_counter() - start_time < duration:
+                request = performance_test_pb2.TestRequest(
+                    request_id=str(messages_sent),
+                    timestamp=self._create_timestamp(),
+                    payload=b'x' * message_size
+                )
+                response = stub.UnaryCall(request)
+                messages_sent += 1
+                bytes_sent += message_size
+            elapsed = time.perf_counter() - start_time
+
+            counters = relay.counters()
+            channel_pool.close()
+
+        actual_bytes = counters['bytes_up']
         expected_bytes = bytes_sent
-        
+
         return {
-            'expected_throughput': bytes_sent / duration,
-            'actual_throughput': actual_bytes / duration,
-            'accuracy_percentage': (actual_bytes / expected_bytes) * 100 if expected_bytes > 0 else 0
+            'expected_throughput': bytes_sent / elapsed,
+            'actual_throughput': actual_bytes / elapsed,
+            'accuracy_percentage': (actual_bytes / expected_bytes) * 100 if expected_bytes > 0 else 0,
+            'wire_overhead_ratio': actual_bytes / expected_bytes if expected_bytes > 0 else 0,
+            'bytes_down': counters['bytes_down'],
+            'messages': messages_sent
         }
 
     def validate_parallel_processing(self, batch_size=5, iterations=5):  # Reduced sizes for testing
@@ -151,14 +165,14 @@ class PerformanceValidator:
         print("\n2. Latency Validation:")
         for r in results['latency_validation']:
             print(f"   Expected: {r['expected_delay']}µs")
-            print(f"   Measured: {r['mean_measured']:.2f}µs")
+            print(f"   Measured: {r['mean_measured']:.2f}µs (p99 {r['p99_measured']}µs)")
             print(f"   Error: {r['error_percentage']:.2f}%")
         
         print("\n3. Throughput Accuracy:")
         ta = results['throughput_accuracy']
-        print(f"   Expected: {ta['expected_throughput']/1024:.2f} KB/s")
-        print(f"   Actual: {ta['actual_throughput']/1024:.2f} KB/s")
-        print(f"   Accuracy: {ta['accuracy_percentage']:.2f}%")
+        print(f"   Expected (payload): {ta['expected_throughput']/1024:.2f} KB/s")
+        print(f"   Actual (on the wire, this connection): {ta['actual_throughput']/1024:.2f} KB/s")
+        print(f"   Accuracy: {ta['accuracy_percentage']:.2f}% (wire / payload {ta['wire_overhead_ratio']:.3f})")
         
         print("\n4. Parallel Processing Efficiency:")
         pp = results['parallel_processing']
@@ -0,0 +1,250 @@
+# wire_accounting.py
+
+import argparse
+import asyncio
+import socket
+import threading
+import uuid
+from urllib.parse import urlsplit
+import performance_test_pb2
+
+UPSTREAM = 'up'
+DOWNSTREAM = 'down'
+
+class TcpRelay:
+    """Local TCP relay that counts the bytes the benchmark's own connections put on the wire.
+
+    Clients connect to relay.address instead of the server; every byte is
+    forwarded unchanged and counted per direction (up: client to server,
+    down: server to client). Counts are TCP payload, i.e. everything the
+    protocol sends (HTTP/2 frames and HPACK, or HTTP/1.1 headers and bodies)
+    but not TCP/IP headers. The relay runs its own event loop on a background
+    thread so synchronous and asyncio clients can both use it.
+
+    Subclasses can change how data is delivered by overriding forward() and
+    end_of_stream(), and delay connection setup by overriding connect_delay().
+    """
+
+    def __init__(self, target_host, target_port, listen_host='127.0.0.1', listen_port=0, chunk_size=65536):
+        self.target_host = target_host
+        self.target_port = target_port
+        self.listen_host = listen_host
+        self.listen_port = listen_port
+        self.chunk_size = chunk_size
+        self.connections = 0
+        self.reset()
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._tasks = set()
+
+    @classmethod
+    def for_target(cls, target, **kwargs):
+        """Relay in front of a gRPC 'host:port' or REST 'http://host:port' target"""
+        parts = urlsplit(target if '://' in target else f"//{target}")
+        return cls(parts.hostname, parts.port or 80, **kwargs)
+
+    @property
+    def address(self):
+        return f"{self.listen_host}:{self.listen_port}"
+
+    @property
+    def url(self):
+        return f"http://{self.address}"
+
+    def reset(self):
+        """Zero the byte counters; connections stay open and keep their count"""
+        self.bytes = {UPSTREAM: 0, DOWNSTREAM: 0}
+
+    def counters(self):
+        return {
+            'bytes_up': self.bytes[UPSTREAM],
+            'bytes_down': self.bytes[DOWNSTREAM],
+            'connections': self.connections
+        }
+
+    async def forward(self, data, direction, writer):
+        """Deliver one chunk read from the other side; override to shape the traffic"""
+        writer.write(data)
+        await writer.drain()
+
+    async def _pump(self, reader, writer, direction):
+        try:
+            while True:
+                data = await reader.read(self.chunk_size)
+                if not data:
+                    break
+                self.bytes[direction] += len(data)
+                await self.forward(data, direction, writer)
+            await self.end_of_stream(direction, writer)
+        except (ConnectionError, OSError):
+            writer.close()
+
+    async def end_of_stream(self, direction, writer):
+        """Pass on a half-close; override together with forward() if it defers writes"""
+        if writer.can_write_eof():
+            writer.write_eof()
+
+    async def connect_delay(self):
+        """Runs after a client is accepted, before the upstream connection opens or any byte is read"""
+
+    async def _handle(self, client_reader, client_writer):
+        self._tasks.add(asyncio.current_task())
+        try:
+            await self.connect_delay()
+            server_reader, server_writer = await asyncio.open_connection(self.target_host, self.target_port)
+        except OSError:
+            client_writer.close()
+            self._tasks.discard(asyncio.current_task())
+            return
+        self.connections += 1
+        for writer in (client_writer, server_writer):
+            writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            await asyncio.gather(
+                self._pump(client_reader, server_writer, UPSTREAM),
+                self._pump(server_reader, client_writer, DOWNSTREAM)
+            )
+        except asyncio.CancelledError:
+            # stop() cancels open connections; end quietly so the server's callback sees no error
+            pass
+        finally:
+            client_writer.close()
+            server_writer.close()
+            self._tasks.discard(asyncio.current_task())
+
+    async def _shutdown(self):
+        self._server.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.listen_host, self.listen_port))
+            self.listen_port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._shutdown())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def _overhead_result(protocol, payload_name, calls, counters, payload_up, payload_down):
+    wire_up = counters['bytes_up'] / calls
+    wire_down = counters['bytes_down'] / calls
+    return {
+        'protocol': protocol,
+        'payload_size': payload_name,
+        'calls': calls,
+        'connections': counters['connections'],
+        'payload_bytes_up': payload_up,
+        'payload_bytes_down': payload_down,
+        'wire_bytes_up': wire_up,
+        'wire_bytes_down': wire_down,
+        'overhead_bytes_up': wire_up - payload_up,
+        'overhead_bytes_down': wire_down - payload_down,
+        'ratio_up': wire_up / payload_up if payload_up else None,
+        'ratio_down': wire_down / payload_down if payload_down else None,
+        'ratio_total': (wire_up + wire_down) / (payload_up + payload_down) if payload_up + payload_down else None
+    }
+
+def measure_grpc_wire_overhead(target, payload_name, calls=1000, warmup=50):
+    """Per-call wire bytes for UnaryCall; payload bytes are the request and echoed response payloads"""
+    from performance_client import PerformanceTestClient
+
+    with TcpRelay.for_target(target) as relay:
+        client = PerformanceTestClient(relay.address)
+        payload_size = performance_test_pb2.PayloadSize.Value(payload_name)
+        payload = client.generate_payload(payload_size)
+
+        def call():
+            client.stub.UnaryCall(performance_test_pb2.TestRequest(
+                request_id=str(uuid.uuid4()),
+                timestamp=client.create_timestamp(),
+                payload_size=payload_size,
+                payload=payload
+            ))
+
+        # Connection preface, SETTINGS and the first HPACK table entries are warmup, not per-call cost
+        for _ in range(warmup):
+            call()
+        relay.reset()
+        for _ in range(calls):
+            call()
+        counters = relay.counters()
+        client.channel_pool.close()
+    return _overhead_result('grpc', payload_name, calls, counters, len(payload), len(payload))
+
+def measure_rest_wire_overhead(target, payload_name, calls=1000, warmup=50):
+    """Per-call wire bytes for POST /unary; the response carries metadata only, so its payload is 0"""
+    from rest_performance_client import RestPerformanceClient, PayloadSize
+
+    with TcpRelay.for_target(target) as relay:
+        client = RestPerformanceClient(relay.url, pool_size=1)
+        payload = client.payload_pool.get_text(PayloadSize[payload_name].value)
+
+        def call():
+            client.transport.post("/unary", json={'request_id': str(uuid.uuid4()), 'payload': payload})
+
+        for _ in range(warmup):
+            call()
+        relay.reset()
+        for _ in range(calls):
+            call()
+        counters = relay.counters()
+        client.transport.close()
+    return _overhead_result('rest', payload_name, calls, counters, len(payload), 0)
+
+def print_wire_overhead(results):
+    print(f"{'protocol':<8} {'payload':<7} {'payload up':>10} {'wire up':>10} {'ratio up':>8} "
+          f"{'wire down':>10} {'ratio down':>10} {'ratio total':>11} {'conns':>5}")
+    for r in results:
+        def ratio(value):
+            return f"{value:.3f}" if value is not None else '-'
+        print(f"{r['protocol']:<8} {r['payload_size']:<7} {r['payload_bytes_up']:>10} "
+              f"{r['wire_bytes_up']:>10.1f} {ratio(r['ratio_up']):>8} {r['wire_bytes_down']:>10.1f} "
+              f"{ratio(r['ratio_down']):>10} {ratio(r['ratio_total']):>11} {r['connections']:>5}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes on the wire per call, gRPC vs REST, via a counting relay")
+    parser.add_argument('--protocol', nargs='+', choices=['grpc', 'rest'], default=['grpc', 'rest'])
+    parser.add_argument('--payload-size', nargs='+', choices=['SMALL', 'MEDIUM', 'LARGE'],
+                        default=['SMALL', 'MEDIUM', 'LARGE'])
+    parser.add_argument('--calls', type=int, default=1000)
+    parser.add_argument('--grpc-target', default='localhost:50051')
+    parser.add_argument('--rest-target', default='http://localhost:8080')
+    args = parser.parse_args()
+
+    results = []
+    for payload_name in args.payload_size:
+        if 'grpc' in args.protocol:
+            results.append(measure_grpc_wire_overhead(args.grpc_target, payload_name, args.calls))
+        if 'rest' in args.protocol:
+            results.append(measure_rest_wire_overhead(args.rest_target, payload_name, args.calls))
+
+    print("\nPer-call bytes on the wire (TCP payload) and wire / payload ratios:")
+    print_wire_overhead(results)
+
+if __name__ == "__main__":
+    main()